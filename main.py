@@ -24,7 +24,7 @@ import shutil
 import glob
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
                              QLabel, QLineEdit, QPushButton, QRadioButton,
-                             QCheckBox, QTextEdit, QFileDialog, QComboBox, QSlider,
+                             QCheckBox, QTextEdit, QPlainTextEdit, QFileDialog, QComboBox, QSlider,
                              QMessageBox, QDialog, QFrame, QButtonGroup, QGraphicsDropShadowEffect,
                              QListWidget, QListWidgetItem, QProgressBar)
 from PyQt6.QtCore import Qt, QTimer, pyqtSignal, QObject, pyqtProperty, QPropertyAnimation, QRect, QPoint
@@ -248,7 +248,7 @@ STYLESHEET = """
     }
 
     /* 底部日志 - 专业终端风格 */
-    QTextEdit#LogArea {
+    QPlainTextEdit#LogArea {
         background-color: #1e2936;
         color: #e8edf2;
         border: none;
@@ -369,19 +369,154 @@ STYLESHEET = """
 """
 
 MINGW_DIR_NAME = "mingw64"
+APP_CACHE_NAME = "PythonPackerPro"
+
+# ===========================
+# 本地缓存目录
+# ===========================
+def get_cache_dir(*parts):
+    """获取本地缓存目录（探测结果、索引等持久化数据），不存在时自动创建"""
+    root = os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), ".cache")
+    path = os.path.join(root, APP_CACHE_NAME, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def _load_json_cache(name):
+    """读取缓存目录中的 JSON 文件，不存在或损坏时返回 None"""
+    import json
+    try:
+        with open(os.path.join(get_cache_dir(), name), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return None
+
+def _save_json_cache(name, data):
+    """原子写入缓存目录中的 JSON 文件（先写临时文件再替换）"""
+    import json
+    try:
+        path = os.path.join(get_cache_dir(), name)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp, path)
+        return True
+    except Exception:
+        return False
+
+def _path_mtime(path):
+    """返回路径的修改时间，不存在时返回 None"""
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+# ===========================
+# 内置工具索引
+# ===========================
+class ToolIndex:
+    """tools/ 目录下内置工具（upx、gcc、ld、strip、objdump 等）的索引。
+
+    只按已知布局扫描每个工具包的根目录、bin 以及 mingw64/bin，每个目录一次 os.scandir，
+    避免对包含完整工具链的 tools/ 做 os.walk。索引持久化到磁盘，以各扫描目录的修改时间校验。
+    """
+    CACHE_NAME = "tool_index.json"
+    CACHE_VERSION = 1
+    SEARCH_SUBDIRS = ("", "bin", os.path.join("mingw64", "bin"))
+
+    def __init__(self, root):
+        self.root = root
+        self._lock = threading.Lock()
+        self._tools = None
+        self._stamps = None
+
+    def _scan_dirs(self):
+        """按已知布局列出需要扫描的目录"""
+        dirs = []
+        try:
+            with os.scandir(self.root) as it:
+                packages = sorted(e.path for e in it if e.is_dir())
+        except OSError:
+            return dirs
+        # 优先内置 MinGW，其余工具包按名称排序
+        packages.sort(key=lambda p: os.path.basename(p) != MINGW_DIR_NAME)
+        for pkg in packages:
+            for sub in self.SEARCH_SUBDIRS:
+                dirs.append(os.path.join(pkg, sub) if sub else pkg)
+        return dirs
+
+    def _current_stamps(self, dirs):
+        stamps = {self.root: _path_mtime(self.root)}
+        stamps.update({d: _path_mtime(d) for d in dirs})
+        return stamps
+
+    def _build(self, dirs):
+        tools = {}
+        for d in dirs:
+            try:
+                with os.scandir(d) as it:
+                    for entry in it:
+                        if not entry.is_file():
+                            continue
+                        name, ext = os.path.splitext(entry.name)
+                        if ext.lower() != ".exe":
+                            continue
+                        tools.setdefault(name.lower(), d)
+            except OSError:
+                continue
+        return tools
+
+    def _ensure(self):
+        with self._lock:
+            # 内存中的索引：只校验目录修改时间
+            if self._tools is not None and self._current_stamps(self._stamps.keys() - {self.root}) == self._stamps:
+                return self._tools
+            dirs = self._scan_dirs()
+            stamps = self._current_stamps(dirs)
+            cached = _load_json_cache(self.CACHE_NAME)
+            if (cached and cached.get("version") == self.CACHE_VERSION
+                    and cached.get("root") == self.root and cached.get("stamps") == stamps):
+                tools = cached.get("tools", {})
+            else:
+                tools = self._build(dirs)
+                _save_json_cache(self.CACHE_NAME, {
+                    "version": self.CACHE_VERSION, "root": self.root,
+                    "stamps": stamps, "tools": tools,
+                })
+            self._tools, self._stamps = tools, stamps
+            return tools
+
+    def find(self, name):
+        """返回工具所在目录（name 不含 .exe），未找到返回 None"""
+        return self._ensure().get(name.lower())
+
+    def find_exe(self, name):
+        """返回工具可执行文件的完整路径，未找到返回 None"""
+        d = self.find(name)
+        return os.path.join(d, f"{name}.exe") if d else None
+
+
+TOOL_INDEX = ToolIndex(os.path.join(BASE_DIR, "tools"))
 
 # ===========================
 # 编译器后端检测
 # ===========================
-def detect_msvc():
-    """检测系统是否安装了 MSVC (Visual Studio)"""
+VSWHERE_PATHS = [
+    r"C:\Program Files (x86)\Microsoft Visual Studio\Installer\vswhere.exe",
+    r"C:\Program Files\Microsoft Visual Studio\Installer\vswhere.exe",
+]
+
+def _builtin_mingw_candidates():
+    """内置 MinGW 的 gcc.exe 候选路径"""
+    return [
+        os.path.join(BASE_DIR, "tools", MINGW_DIR_NAME, "mingw64", "bin", "gcc.exe"),
+        os.path.join(BASE_DIR, "tools", MINGW_DIR_NAME, "bin", "gcc.exe"),
+    ]
+
+def _probe_msvc():
+    """实际探测系统是否安装了 MSVC (Visual Studio)，返回 (是否可用, 命中的可执行文件路径)"""
     try:
         # 方法1: 检查 vswhere 工具
-        vswhere_paths = [
-            r"C:\Program Files (x86)\Microsoft Visual Studio\Installer\vswhere.exe",
-            r"C:\Program Files\Microsoft Visual Studio\Installer\vswhere.exe",
-        ]
-        for vswhere in vswhere_paths:
+        for vswhere in VSWHERE_PATHS:
             if os.path.exists(vswhere):
                 result = subprocess.run(
                     [vswhere, "-latest", "-property", "installationPath"],
@@ -389,11 +524,11 @@ def detect_msvc():
                     startupinfo=_get_silent_startupinfo()
                 )
                 if result.returncode == 0 and result.stdout.strip():
-                    return True
+                    return True, vswhere
         
         # 方法2: 检查环境变量
         if os.environ.get("VCINSTALLDIR") or os.environ.get("VS140COMNTOOLS"):
-            return True
+            return True, None
         
         # 方法3: 尝试运行 cl.exe
         result = subprocess.run(
@@ -402,24 +537,19 @@ def detect_msvc():
             startupinfo=_get_silent_startupinfo()
         )
         if result.returncode == 0:
-            return True
+            return True, result.stdout.strip().split('\n')[0].strip()
             
     except Exception:
         pass
-    return False
+    return False, None
 
-def detect_mingw():
-    """检测系统是否安装了 MinGW"""
+def _probe_mingw():
+    """实际探测系统是否安装了 MinGW，返回 (类型, bin 目录)"""
     try:
-        # 方法1: 检查内置的 MinGW
-        base = BASE_DIR
-        mingw_paths = [
-            os.path.join(base, "tools", MINGW_DIR_NAME, "mingw64", "bin", "gcc.exe"),
-            os.path.join(base, "tools", MINGW_DIR_NAME, "bin", "gcc.exe"),
-        ]
-        for p in mingw_paths:
-            if os.path.exists(p):
-                return "builtin", os.path.dirname(p)
+        # 方法1: 检查内置的 MinGW（从内置工具索引查找）
+        gcc_dir = TOOL_INDEX.find("gcc")
+        if gcc_dir:
+            return "builtin", gcc_dir
         
         # 方法2: 检查系统 PATH 中的 MinGW
         result = subprocess.run(
@@ -428,13 +558,116 @@ def detect_mingw():
             startupinfo=_get_silent_startupinfo()
         )
         if result.returncode == 0:
-            gcc_path = result.stdout.strip().split('\n')[0]
+            gcc_path = result.stdout.strip().split('\n')[0].strip()
             return "system", os.path.dirname(gcc_path)
             
     except Exception:
         pass
     return None, None
 
+
+class ToolchainRegistry:
+    """编译后端注册表：启动时在后台线程探测一次，结果持久化到磁盘，之后全部从内存读取。
+
+    缓存以探测涉及的可执行文件、PATH 中各目录的修改时间以及相关环境变量作为签名，
+    任意一项变化（安装/卸载编译器、修改 PATH）都会使缓存失效并重新探测。
+    """
+    CACHE_NAME = "toolchains.json"
+    CACHE_VERSION = 1
+    ENV_KEYS = ("PATH", "VCINSTALLDIR", "VS140COMNTOOLS")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._thread = None
+        self._result = None
+
+    @property
+    def is_ready(self):
+        return self._ready.is_set()
+
+    def _signature(self, files):
+        """计算探测结果的签名（只做 stat，不启动子进程）"""
+        path_dirs = [d for d in os.environ.get("PATH", "").split(os.pathsep) if d]
+        return {
+            "files": {p: _path_mtime(p) for p in sorted(set(files))},
+            "path_dirs": {d: _path_mtime(d) for d in path_dirs},
+            "env": {k: os.environ.get(k, "") for k in self.ENV_KEYS},
+        }
+
+    def _load_valid_cache(self):
+        cached = _load_json_cache(self.CACHE_NAME)
+        if not cached or cached.get("version") != self.CACHE_VERSION:
+            return None
+        signature = cached.get("signature") or {}
+        if self._signature(signature.get("files", {}).keys()) != signature:
+            return None
+        return cached
+
+    def _probe(self):
+        has_msvc, msvc_exe = _probe_msvc()
+        mingw_type, mingw_path = _probe_mingw()
+        files = VSWHERE_PATHS + _builtin_mingw_candidates()
+        if msvc_exe:
+            files.append(msvc_exe)
+        if mingw_path:
+            files.append(os.path.join(mingw_path, "gcc.exe"))
+        result = {
+            "version": self.CACHE_VERSION,
+            "msvc": has_msvc,
+            "mingw": [mingw_type, mingw_path],
+            "signature": self._signature(files),
+        }
+        _save_json_cache(self.CACHE_NAME, result)
+        return result
+
+    def _set_result(self, result, callback):
+        with self._lock:
+            self._result = result
+            self._thread = None
+        self._ready.set()
+        if callback:
+            callback()
+
+    def start_background_probe(self, callback=None, force=False):
+        """启动后台探测；磁盘缓存仍然有效时直接使用缓存（callback 在调用线程中立即执行）"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            cached = None if force else self._load_valid_cache()
+            if cached is None:
+                self._ready.clear()
+                self._thread = threading.Thread(
+                    target=lambda: self._set_result(self._probe(), callback), daemon=True)
+                self._thread.start()
+                return
+            self._result = cached
+        self._ready.set()
+        if callback:
+            callback()
+
+    def get(self):
+        """获取探测结果；后台探测尚未完成时等待，从未探测过时同步探测一次"""
+        if not self._ready.is_set():
+            with self._lock:
+                started = self._thread is not None
+            if not started:
+                self.start_background_probe()
+            self._ready.wait()
+        return self._result
+
+
+TOOLCHAINS = ToolchainRegistry()
+
+def detect_msvc():
+    """检测系统是否安装了 MSVC (Visual Studio)（从编译后端注册表读取）"""
+    return bool(TOOLCHAINS.get()["msvc"])
+
+def detect_mingw():
+    """检测系统是否安装了 MinGW（从编译后端注册表读取）"""
+    mingw_type, mingw_path = TOOLCHAINS.get()["mingw"]
+    return mingw_type, mingw_path
+
 def get_available_backends():
     """获取可用的编译后端列表"""
     backends = ["自动选择"]
@@ -494,6 +727,757 @@ def _get_silent_startupinfo():
     return None
 
 
+# ===========================
+# 项目依赖分析
+# ===========================
+def _scan_source(source, path):
+    """解析单个源文件的导入语句，返回 (imports, error)；imports 为 [模块名, 相对层级, 导入的名称列表]。
+
+    定义在模块顶层以便在进程池中执行。
+    """
+    try:
+        tree = ast.parse(source, filename=path)
+    except SyntaxError as e:
+        return [], f"{path}: {e}"
+    except Exception as e:
+        return [], f"{path}: {e}"
+    imports = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                imports.append([alias.name, 0, []])
+        elif isinstance(node, ast.ImportFrom):
+            imports.append([node.module or "", node.level, [a.name for a in node.names if a.name != "*"]])
+    return imports, None
+
+
+class ProjectModel:
+    """项目分析结果：入口脚本出发可达的本地源文件及其外部导入"""
+    def __init__(self, entry, root):
+        self.entry = entry
+        self.root = root
+        self.files = []             # 可达的本地源文件
+        self.local_modules = set()  # 本地顶层模块/包名
+        self.external_roots = set() # 非本地的顶层导入名（含标准库）
+        self.external_imports = set()  # 非本地的完整导入名（如 PyQt6.QtWidgets）
+        self.errors = []            # 解析失败的文件
+        self.stamps = {}            # 校验用的 (mtime, size)
+
+    def third_party_roots(self, stdlib):
+        """排除标准库后的第三方顶层导入名"""
+        return sorted(self.external_roots - set(stdlib))
+
+
+class ProjectAnalyzer:
+    """从入口脚本出发跟踪本地导入（含相对导入），得到整个项目的依赖模型。
+
+    单文件解析结果按内容哈希缓存到磁盘，未命中的文件较多时使用进程池并行解析；
+    分析结果在进程内按文件修改时间记忆，依赖检查、Nuitka 与 PyInstaller 共用同一个模型。
+    """
+    PARALLEL_THRESHOLD = 32  # 未命中缓存的文件数达到该值时启用进程池
+    CACHE_VERSION = 1
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._models = {}
+
+    @staticmethod
+    def _module_path(root, dotted):
+        """将模块名解析为项目内的文件路径（模块文件或包的 __init__.py），不存在返回 None"""
+        base = os.path.join(root, *dotted.split("."))
+        for candidate in (base + ".py", os.path.join(base, "__init__.py")):
+            if os.path.isfile(candidate):
+                return candidate
+        return None
+
+    @staticmethod
+    def _module_name(root, path):
+        rel = os.path.splitext(os.path.relpath(path, root))[0]
+        parts = rel.split(os.sep)
+        if parts[-1] == "__init__":
+            parts = parts[:-1]
+        return ".".join(parts)
+
+    def _is_local_root(self, root, name):
+        """name 是否是项目内的顶层模块：模块文件、带 __init__.py 的包，或含有 .py 文件的命名空间包目录。
+
+        只有数据文件的同名目录（如 requests/readme.txt）不算：sys.path 上的常规包优先于命名空间目录，
+        Python 实际导入的是已安装的第三方包。
+        """
+        if self._module_path(root, name) is not None:
+            return True
+        directory = os.path.join(root, name)
+        if not os.path.isdir(directory):
+            return False
+        for dirpath, dirnames, filenames in os.walk(directory):
+            if any(f.endswith(".py") for f in filenames):
+                return True
+            # 只继续查找能作为子包名的目录
+            dirnames[:] = [d for d in dirnames if d.isidentifier() and d != "__pycache__"]
+        return False
+
+    def _cache_name(self, root):
+        import hashlib
+        return os.path.join("projects", hashlib.sha1(os.path.normcase(root).encode("utf-8")).hexdigest() + ".json")
+
+    def _is_fresh(self, model):
+        return all(_path_mtime(p) == stamp for p, stamp in model.stamps.items())
+
+    def analyze(self, entry, signal=None):
+        """分析入口脚本所在项目，返回 ProjectModel（未变化时直接返回记忆的结果）"""
+        entry = os.path.abspath(entry)
+        with self._lock:
+            model = self._models.get(entry)
+            if model is not None and self._is_fresh(model):
+                return model
+            model = self._analyze(entry, signal)
+            self._models[entry] = model
+            return model
+
+    def _analyze(self, entry, signal):
+        import hashlib
+        start = time.time()
+        root = os.path.dirname(entry)
+        model = ProjectModel(entry, root)
+        get_cache_dir("projects")
+        cache = _load_json_cache(self._cache_name(root)) or {}
+        if cache.get("version") != self.CACHE_VERSION:
+            cache = {"version": self.CACHE_VERSION, "files": {}}
+        cached_files = cache["files"]
+        used_hashes = {}
+        seen = {entry}
+        pending = [entry]
+        parsed_count = 0
+        pool = None
+        try:
+            while pending:
+                # 读取本轮文件并按内容哈希查缓存
+                results = {}
+                to_parse = []
+                for path in pending:
+                    try:
+                        with open(path, "rb") as f:
+                            source = f.read()
+                    except OSError as e:
+                        model.errors.append(f"{path}: {e}")
+                        continue
+                    digest = hashlib.sha1(source).hexdigest()
+                    used_hashes[digest] = True
+                    if digest in cached_files:
+                        results[path] = cached_files[digest]
+                    else:
+                        to_parse.append((path, digest, source))
+                # 解析未命中的文件
+                if len(to_parse) >= self.PARALLEL_THRESHOLD:
+                    if pool is None:
+                        from concurrent.futures import ProcessPoolExecutor
+                        pool = ProcessPoolExecutor(max_workers=min(os.cpu_count() or 4, 8))
+                    parsed = pool.map(_scan_source, [s for _, _, s in to_parse], [p for p, _, _ in to_parse],
+                                      chunksize=8)
+                else:
+                    parsed = (_scan_source(s, p) for p, _, s in to_parse)
+                for (path, digest, _), (imports, error) in zip(to_parse, parsed):
+                    parsed_count += 1
+                    if error:
+                        model.errors.append(error)
+                        continue
+                    cached_files[digest] = imports
+                    results[path] = imports
+                # 解析导入，收集新的本地文件
+                pending = []
+                for path, imports in results.items():
+                    model.files.append(path)
+                    for target in self._resolve(root, path, imports, model):
+                        if target not in seen:
+                            seen.add(target)
+                            pending.append(target)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        model.files.sort()
+        # 记忆校验：所有访问过的源文件（含解析失败的）及其所在目录（新增本地模块会改变目录修改时间）
+        for path in seen:
+            model.stamps[path] = _path_mtime(path)
+            model.stamps.setdefault(os.path.dirname(path), _path_mtime(os.path.dirname(path)))
+        model.stamps.setdefault(root, _path_mtime(root))
+        if parsed_count or len(cached_files) != len(used_hashes):
+            cache["files"] = {h: cached_files[h] for h in used_hashes if h in cached_files}
+            _save_json_cache(self._cache_name(root), cache)
+        if signal:
+            signal.emit(f"项目分析: {len(model.files)} 个源文件（重新解析 {parsed_count} 个），"
+                        f"用时 {time.time() - start:.2f} 秒\n")
+        return model
+
+    def _resolve(self, root, path, imports, model):
+        """解析单个文件的导入，记录外部导入并返回引用到的本地文件"""
+        targets = []
+        module = self._module_name(root, path)
+        is_package = os.path.basename(path) == "__init__.py"
+        for name, level, names in imports:
+            if level:
+                # 相对导入：以当前模块所在包为基准向上 level-1 层
+                parts = module.split(".") if module else []
+                if not is_package:
+                    parts = parts[:-1]
+                if level - 1 > len(parts):
+                    continue
+                parts = parts[:len(parts) - (level - 1)]
+                dotted = ".".join(parts + ([name] if name else []))
+            else:
+                dotted = name
+                top = name.split(".")[0]
+                if not self._is_local_root(root, top):
+                    model.external_roots.add(top)
+                    model.external_imports.add(name)
+                    for sub in names:
+                        model.external_imports.add(f"{name}.{sub}")
+                    continue
+            if not dotted:
+                # from . import x （项目根目录）
+                candidates = []
+            else:
+                model.local_modules.add(dotted.split(".")[0])
+                # 导入 a.b.c 会依次执行 a、a.b、a.b.c
+                chain = dotted.split(".")
+                candidates = [".".join(chain[:i]) for i in range(1, len(chain) + 1)]
+            candidates += [f"{dotted}.{sub}" if dotted else sub for sub in names]
+            for candidate in candidates:
+                target = self._module_path(root, candidate)
+                if target:
+                    if not dotted:
+                        model.local_modules.add(candidate.split(".")[0])
+                    targets.append(target)
+        return targets
+
+
+PROJECT_ANALYZER = ProjectAnalyzer()
+
+# ===========================
+# 导入名与发行包映射
+# ===========================
+def _canonical_name(name):
+    """规范化发行包名（PEP 503）：小写，连续的 - _ . 替换为 -"""
+    import re
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+def _requirement_name(spec):
+    """从需求字符串（如 requests[socks]>=2.0）中提取发行包名"""
+    import re
+    return re.split(r"[\s\[<>=!~;@]", spec.strip(), maxsplit=1)[0]
+
+def _requirement_satisfied(spec, version):
+    """已安装版本是否满足需求字符串中的版本约束；没有约束或无法解析时视为满足"""
+    pkg = _load_packaging()
+    if pkg is None:
+        return True
+    try:
+        return pkg[1].Requirement(spec).specifier.contains(version, prereleases=True)
+    except Exception:
+        return True
+
+def _top_levels_from_record(lines):
+    """根据 RECORD 中的文件列表推断顶层模块名（与 importlib.metadata.packages_distributions 的回退逻辑一致）"""
+    names = set()
+    for line in lines:
+        path = line.split(",")[0].strip().replace("\\", "/")
+        if not path:
+            continue
+        parts = path.split("/")
+        first = parts[0]
+        if first in ("..", "__pycache__") or first.endswith((".dist-info", ".egg-info", ".data")):
+            continue
+        if len(parts) > 1:
+            names.add(first)
+        elif first.endswith(".py"):
+            names.add(first[:-3])
+        elif first.endswith((".pyd", ".so")):
+            names.add(first.split(".")[0])
+    return sorted(names)
+
+def _namespace_subpackages(paths):
+    """文件路径中命名空间包（顶层目录下没有 __init__.py，如 google）的二级包名，如 google/protobuf/... -> google.protobuf"""
+    paths = [p.split(",")[0].strip().replace("\\", "/") for p in paths]
+    regular = {p.split("/")[0] for p in paths if p.count("/") == 1 and p.endswith("/__init__.py")}
+    names = set()
+    for path in paths:
+        parts = path.split("/")
+        first = parts[0]
+        if (len(parts) > 2 and first not in regular and parts[1] != "__pycache__"
+                and first not in ("..", "__pycache__") and not first.endswith((".dist-info", ".egg-info", ".data"))):
+            names.add(f"{first}.{parts[1]}")
+    return sorted(names)
+
+def _requires_from_metadata(lines, egg_requires=False):
+    """从 METADATA 的 Requires-Dist（或 egg-info 的 requires.txt）提取无条件依赖的规范化包名，忽略 extra 依赖"""
+    names = set()
+    for line in lines:
+        if egg_requires:
+            if line.startswith("["):
+                break  # 之后都是 extra 或带条件的依赖段
+            spec = line
+        elif line.startswith("Requires-Dist:"):
+            spec = line[len("Requires-Dist:"):]
+        elif not line.strip():
+            break  # 头部结束，之后是长描述
+        else:
+            continue
+        if "extra" in spec.partition(";")[2]:
+            continue
+        name = _requirement_name(spec)
+        if name:
+            names.add(_canonical_name(name))
+    return sorted(names)
+
+
+class DistributionIndex:
+    """已安装发行包扫描器与 导入名 -> 发行包名 的索引。
+
+    直接读取目标环境 site-packages 中各 *.dist-info/*.egg-info 的 top_level.txt（缺失时读 RECORD），
+    并可附加一个本地 wheelhouse（读取 wheel 内的同名文件）。顶层是命名空间包（如 google）时，
+    另按 RECORD 记录二级包名（google.protobuf），使命名空间包的依赖也能由元数据确定发行包。索引持久化到磁盘，
+    目录修改时间不变时整体复用，变化时只重新读取新增或修改的条目。
+    """
+    CACHE_NAME = "dist_index.json"
+    CACHE_VERSION = 3
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cache = None
+
+    def _load(self):
+        if self._cache is None:
+            cache = _load_json_cache(self.CACHE_NAME) or {}
+            if cache.get("version") != self.CACHE_VERSION:
+                cache = {"version": self.CACHE_VERSION, "sources": {}}
+            self._cache = cache
+        return self._cache
+
+    @staticmethod
+    def _read_installed_entry(path):
+        """读取一个 *.dist-info / *.egg-info 条目，返回 {name, version, top_level}"""
+        base, ext = os.path.splitext(os.path.basename(path))
+        parts = base.split("-")
+        entry = {"name": parts[0], "version": parts[1] if len(parts) > 1 else "", "top_level": [], "requires": []}
+        record = None
+        for filename in ("top_level.txt", "RECORD"):
+            try:
+                with open(os.path.join(path, filename), "r", encoding="utf-8", errors="replace") as f:
+                    lines = f.read().splitlines()
+            except OSError:
+                continue
+            if filename == "top_level.txt":
+                entry["top_level"] = sorted({l.strip() for l in lines if l.strip()})
+            else:
+                entry["top_level"] = _top_levels_from_record(lines)
+                record = lines
+            break
+        site = os.path.dirname(path)
+        if any(os.path.isdir(os.path.join(site, top)) and not os.path.isfile(os.path.join(site, top, "__init__.py"))
+               for top in entry["top_level"]):
+            if record is None:
+                try:
+                    with open(os.path.join(path, "RECORD"), "r", encoding="utf-8", errors="replace") as f:
+                        record = f.read().splitlines()
+                except OSError:
+                    record = []
+            entry["top_level"] += _namespace_subpackages(record)
+        metadata = ("METADATA",) if ext == ".dist-info" else ("requires.txt",)
+        for filename in metadata:
+            try:
+                with open(os.path.join(path, filename), "r", encoding="utf-8", errors="replace") as f:
+                    entry["requires"] = _requires_from_metadata(f.read().splitlines(), filename == "requires.txt")
+            except OSError:
+                pass
+        return entry
+
+    @staticmethod
+    def _read_wheel_entry(path):
+        """读取一个 wheel 文件，返回 {name, version, top_level}"""
+        import zipfile
+        parts = os.path.basename(path)[:-4].split("-")
+        entry = {"name": parts[0], "version": parts[1] if len(parts) > 1 else "", "top_level": []}
+        try:
+            with zipfile.ZipFile(path) as zf:
+                names = zf.namelist()
+                for suffix in ("top_level.txt", "RECORD"):
+                    member = next((n for n in names if n.endswith(f".dist-info/{suffix}") and n.count("/") == 1), None)
+                    if member is None:
+                        continue
+                    lines = zf.read(member).decode("utf-8", "replace").splitlines()
+                    if suffix == "top_level.txt":
+                        entry["top_level"] = sorted({l.strip() for l in lines if l.strip()})
+                    else:
+                        entry["top_level"] = _top_levels_from_record(lines)
+                    break
+                entry["top_level"] += _namespace_subpackages(names)
+        except (OSError, zipfile.BadZipFile):
+            pass
+        return entry
+
+    def _refresh_source(self, directory, kind):
+        """增量刷新一个目录（site-packages 或 wheelhouse），返回是否有变化"""
+        sources = self._load()["sources"]
+        key = f"{kind}:{os.path.normcase(os.path.abspath(directory))}"
+        stamp = _path_mtime(directory)
+        source = sources.get(key)
+        if source is not None and source.get("stamp") == stamp:
+            return False
+        old_entries = source["entries"] if source else {}
+        entries = {}
+        try:
+            with os.scandir(directory) as it:
+                for item in it:
+                    if kind == "site":
+                        if not item.name.endswith((".dist-info", ".egg-info")):
+                            continue
+                    elif not item.name.endswith(".whl"):
+                        continue
+                    mtime = item.stat().st_mtime
+                    old = old_entries.get(item.name)
+                    if old is not None and old.get("mtime") == mtime:
+                        entries[item.name] = old
+                        continue
+                    if kind == "site":
+                        entry = self._read_installed_entry(item.path)
+                    else:
+                        entry = self._read_wheel_entry(item.path)
+                    entry["mtime"] = mtime
+                    entries[item.name] = entry
+        except OSError:
+            pass
+        sources[key] = {"stamp": stamp, "entries": entries}
+        return True
+
+    def refresh(self, site_dirs, wheelhouse=None):
+        """刷新目标环境与 wheelhouse 的索引，返回 (已安装映射, wheelhouse 映射)"""
+        with self._lock:
+            changed = False
+            for d in site_dirs:
+                changed |= self._refresh_source(d, "site")
+            if wheelhouse and os.path.isdir(wheelhouse):
+                changed |= self._refresh_source(wheelhouse, "wheel")
+            if changed:
+                _save_json_cache(self.CACHE_NAME, self._cache)
+            sources = self._cache["sources"]
+            installed = self._mapping(sources, "site", site_dirs)
+            wheels = self._mapping(sources, "wheel", [wheelhouse] if wheelhouse else [])
+            return installed, wheels
+
+    def _entries(self, kind, dirs):
+        """刷新并返回指定目录下的全部条目"""
+        with self._lock:
+            changed = False
+            for d in dirs:
+                changed |= self._refresh_source(d, kind)
+            if changed:
+                _save_json_cache(self.CACHE_NAME, self._cache)
+            entries = []
+            for d in dirs:
+                source = self._cache["sources"].get(f"{kind}:{os.path.normcase(os.path.abspath(d))}")
+                if source:
+                    entries.extend(source["entries"].values())
+            return entries
+
+    def installed_versions(self, site_dirs):
+        """扫描 site-packages 中已安装的发行包，返回 {规范化包名: 版本}"""
+        versions = {}
+        for entry in self._entries("site", site_dirs):
+            versions.setdefault(_canonical_name(entry["name"]), entry["version"])
+        return versions
+
+    def installed_graph(self, site_dirs):
+        """已安装发行包的依赖图，返回 {规范化包名: (顶层模块名列表, 无条件依赖列表)}"""
+        graph = {}
+        for entry in self._entries("site", site_dirs):
+            graph.setdefault(_canonical_name(entry["name"]), (entry["top_level"], entry.get("requires", [])))
+        return graph
+
+    def wheel_versions(self, wheelhouse):
+        """wheelhouse 清单，返回 {规范化包名: [可用版本, ...]}"""
+        manifest = {}
+        for entry in self._entries("wheel", [wheelhouse]):
+            versions = manifest.setdefault(_canonical_name(entry["name"]), [])
+            if entry["version"] not in versions:
+                versions.append(entry["version"])
+        return manifest
+
+    @staticmethod
+    def _mapping(sources, kind, dirs):
+        """合并指定目录的条目，得到 {导入名: [发行包名, ...]}"""
+        mapping = {}
+        for d in dirs:
+            source = sources.get(f"{kind}:{os.path.normcase(os.path.abspath(d))}")
+            if not source:
+                continue
+            for entry in source["entries"].values():
+                for top in entry["top_level"]:
+                    dists = mapping.setdefault(top, [])
+                    if entry["name"] not in dists:
+                        dists.append(entry["name"])
+        return mapping
+
+
+DIST_INDEX = DistributionIndex()
+
+# ===========================
+# 依赖安装后端
+# ===========================
+class PipInstaller:
+    """使用目标解释器的 pip 安装依赖"""
+    name = "pip"
+
+    def __init__(self, python_path):
+        self.python_path = python_path
+
+    def source_args(self, index_url=None, trusted_host=None, find_links=None):
+        """安装源参数：find_links 表示离线 wheel 目录，否则使用 index_url"""
+        if find_links:
+            return ["--no-index", "--find-links", find_links]
+        args = ["-i", index_url] if index_url else []
+        if trusted_host:
+            args += ["--trusted-host", trusted_host]
+        return args
+
+    def install_cmd(self, specs, source_args):
+        return [self.python_path, "-m", "pip", "install", *specs, *source_args]
+
+    def list_cmd(self):
+        return [self.python_path, "-m", "pip", "list", "--format=freeze"]
+
+
+class UvInstaller(PipInstaller):
+    """使用 uv 为目标解释器安装依赖（解析与安装都明显快于 pip）"""
+    name = "uv"
+
+    def __init__(self, python_path, uv_path):
+        super().__init__(python_path)
+        self.uv_path = uv_path
+
+    def source_args(self, index_url=None, trusted_host=None, find_links=None):
+        # uv 通过 HTTPS 访问镜像，不需要 --trusted-host
+        if find_links:
+            return ["--no-index", "--find-links", find_links]
+        return ["--index-url", index_url] if index_url else []
+
+    def install_cmd(self, specs, source_args):
+        return [self.uv_path, "pip", "install", "--python", self.python_path, *specs, *source_args]
+
+    def list_cmd(self):
+        return [self.uv_path, "pip", "list", "--python", self.python_path, "--format=freeze"]
+
+
+def find_uv():
+    """查找 uv：优先 tools/ 中内置的，其次系统 PATH"""
+    return TOOL_INDEX.find_exe("uv") or shutil.which("uv")
+
+# ===========================
+# 声明依赖同步
+# ===========================
+def _load_packaging():
+    """packaging 库（优先独立安装的，其次 pip 内置的），都不可用时返回 None"""
+    try:
+        from packaging import markers, requirements, specifiers, version
+    except ImportError:
+        try:
+            from pip._vendor.packaging import markers, requirements, specifiers, version
+        except ImportError:
+            return None
+    return markers, requirements, specifiers, version
+
+
+class ProjectRequirements:
+    """入口脚本旁声明的依赖：uv.lock（精确版本）> requirements*.txt > pyproject.toml。
+
+    每条依赖为 {"name", "spec", "pin", "specifier"}：spec 是交给安装器的需求字符串，
+    pin 为锁定的精确版本（没有则为 None）。环境标记按目标解释器的 Python 版本求值。
+    """
+    def __init__(self, source, requirements):
+        self.source = source
+        self.requirements = requirements
+
+    @classmethod
+    def find(cls, entry, python_version=None):
+        """查找并解析入口脚本所在目录的依赖声明，没有时返回 None"""
+        root = os.path.dirname(os.path.abspath(entry))
+        env = cls._marker_env(python_version)
+        lock = os.path.join(root, "uv.lock")
+        if os.path.isfile(lock):
+            return cls(lock, cls._parse_uv_lock(lock, env))
+        req_files = sorted(glob.glob(os.path.join(root, "requirements*.txt")))
+        if req_files:
+            reqs = []
+            for path in req_files:
+                reqs.extend(cls._parse_requirements_txt(path, env, set()))
+            return cls(req_files[0] if len(req_files) == 1 else ", ".join(req_files), reqs)
+        pyproject = os.path.join(root, "pyproject.toml")
+        if os.path.isfile(pyproject):
+            import tomllib
+            with open(pyproject, "rb") as f:
+                data = tomllib.load(f)
+            lines = data.get("project", {}).get("dependencies", [])
+            return cls(pyproject, [r for r in (cls._parse_requirement(l, env) for l in lines) if r])
+        return None
+
+    @staticmethod
+    def _marker_env(python_version):
+        """环境标记求值时覆盖为目标解释器的 Python 版本（如 "Python 3.12.1"）"""
+        if not python_version:
+            return {}
+        full = python_version.replace("Python", "").strip()
+        return {"python_full_version": full, "python_version": ".".join(full.split(".")[:2])}
+
+    @staticmethod
+    def _marker_matches(marker, env):
+        if not marker:
+            return True
+        pkg = _load_packaging()
+        if pkg is None:
+            return True
+        try:
+            return pkg[0].Marker(marker).evaluate(env)
+        except Exception:
+            return True
+
+    @classmethod
+    def _parse_requirement(cls, line, env):
+        """解析一条需求字符串，不适用于当前环境或无法解析时返回 None"""
+        import re
+        line = line.strip()
+        if not line:
+            return None
+        requirement, _, marker = line.partition(";")
+        if not cls._marker_matches(marker.strip(), env):
+            return None
+        match = re.match(r"^([A-Za-z0-9][A-Za-z0-9._-]*)\s*(\[[^\]]*\])?\s*(.*)$", requirement.strip())
+        if not match or "@" in match.group(3) or "/" in match.group(3):
+            return None
+        specifier = match.group(3).strip().replace(" ", "")
+        pin = None
+        if specifier.startswith("==") and "," not in specifier and "*" not in specifier:
+            pin = specifier[2:]
+        return {"name": match.group(1), "spec": requirement.strip(), "pin": pin, "specifier": specifier}
+
+    @classmethod
+    def _parse_requirements_txt(cls, path, env, visited):
+        if path in visited:
+            return []
+        visited.add(path)
+        reqs = []
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                lines = f.read().splitlines()
+        except OSError:
+            return reqs
+        for line in lines:
+            line = line.split(" #")[0].strip()
+            if not line or line.startswith("#"):
+                continue
+            if line.startswith(("-r ", "--requirement ")):
+                include = os.path.join(os.path.dirname(path), line.split(None, 1)[1].strip())
+                reqs.extend(cls._parse_requirements_txt(include, env, visited))
+                continue
+            if line.startswith("-"):
+                continue
+            req = cls._parse_requirement(line, env)
+            if req:
+                reqs.append(req)
+        return reqs
+
+    @classmethod
+    def _parse_uv_lock(cls, path, env):
+        """从 uv.lock 中取出项目（virtual/editable 源）可达的全部锁定包"""
+        import tomllib
+        with open(path, "rb") as f:
+            packages = tomllib.load(f).get("package", [])
+        by_name = {}
+        roots = []
+        for package in packages:
+            by_name.setdefault(_canonical_name(package["name"]), package)
+            source = package.get("source", {})
+            if "virtual" in source or "editable" in source:
+                roots.append(package)
+        pending = list(roots)
+        seen = {_canonical_name(p["name"]) for p in roots}
+        reqs = []
+        while pending:
+            package = pending.pop()
+            for dep in package.get("dependencies", []):
+                name = _canonical_name(dep["name"])
+                if name in seen or not cls._marker_matches(dep.get("marker"), env):
+                    continue
+                seen.add(name)
+                locked = by_name.get(name)
+                if locked is None:
+                    continue
+                pending.append(locked)
+                version = locked.get("version")
+                reqs.append({
+                    "name": locked["name"],
+                    "spec": f"{locked['name']}=={version}" if version else locked["name"],
+                    "pin": version,
+                    "specifier": f"=={version}" if version else "",
+                })
+        return sorted(reqs, key=lambda r: _canonical_name(r["name"]))
+
+    def diff(self, installed):
+        """与已安装版本 {规范化包名: 版本} 比较，返回 (缺失的需求, 版本不符的需求)"""
+        pkg = _load_packaging()
+        missing, mismatched = [], []
+        for req in self.requirements:
+            version = installed.get(_canonical_name(req["name"]))
+            if version is None:
+                missing.append(req)
+            elif not self._satisfied(version, req, pkg):
+                mismatched.append(req)
+        return missing, mismatched
+
+    @staticmethod
+    def _satisfied(version, req, pkg):
+        if pkg is not None and req["specifier"]:
+            try:
+                return pkg[2].SpecifierSet(req["specifier"]).contains(version, prereleases=True)
+            except Exception:
+                pass
+        if req["pin"]:
+            return version == req["pin"]
+        return True
+
+# 在目标解释器中一次性运行的探测脚本，输出 JSON（兼容 Python 3.8+）
+_INTERPRETER_PROBE_SCRIPT = r'''
+import sys, os, json, site, platform
+info = {
+    "version": "Python " + platform.python_version(),
+    "stdlib": sorted(getattr(sys, "stdlib_module_names", ())) or None,
+    "builtins": sorted(sys.builtin_module_names),
+    "sys_path": [p for p in sys.path if p],
+}
+sp = list(site.getsitepackages()) if hasattr(site, "getsitepackages") else []
+if site.ENABLE_USER_SITE:
+    sp.append(site.getusersitepackages())
+sp += [p for p in sys.path if os.path.basename(p.rstrip("/\\")) in ("site-packages", "dist-packages")]
+seen = []
+for p in sp:
+    p = os.path.normcase(os.path.abspath(p))
+    if os.path.isdir(p) and p not in seen:
+        seen.append(p)
+info["site_packages"] = seen
+sys.stdout.write(json.dumps(info))
+'''
+
+# 在目标解释器中批量解析模块是否可导入（只调用 find_spec，不执行模块代码）
+_RESOLVE_IMPORTS_SCRIPT = r'''
+import sys, json, importlib.util
+result = {}
+for name in json.loads(sys.argv[1]):
+    try:
+        result[name] = ["found" if importlib.util.find_spec(name) is not None else "missing", ""]
+    except ModuleNotFoundError:
+        result[name] = ["missing", ""]
+    except Exception as e:
+        result[name] = ["error", "%s: %s" % (type(e).__name__, e)]
+sys.stdout.write(json.dumps(result))
+'''
+
 class EnvManager:
     # 完整的Python标准库列表（Python 3.8+）
     STANDARD_LIBS = {
@@ -530,7 +1514,8 @@ class EnvManager:
         '_thread', '_winapi', 'nt', 'ntpath', 'zoneinfo', 'graphlib', 'tomllib',
     }
     
-    # 导入名到pip包名的映射
+    # 导入名到pip包名的回退映射：发行包名优先取自元数据（已安装环境、wheelhouse），
+    # 只有包既未安装、wheelhouse 中也没有时才用到，这里只保留导入名与发行包名不同的常见包
     PACKAGE_MAP = {
         "PIL": "Pillow",
         "cv2": "opencv-python",
@@ -544,29 +1529,132 @@ class EnvManager:
         "Crypto": "pycryptodome",
         "OpenSSL": "pyOpenSSL",
         "wx": "wxPython",
-        "nuitka": "nuitka",
-        "PyInstaller": "PyInstaller",
-        "PyQt5": "PyQt5",
-        "PyQt6": "PyQt6",
-        "PySide2": "PySide2",
-        "PySide6": "PySide6",
+        "google.protobuf": "protobuf",
     }
     
+    # 命名空间包：依赖以二级模块名报告（如 google.protobuf）
+    NAMESPACE_PACKAGES = {"google", "azure"}
+    
     CHECK_TIMEOUT = 10  # 检查包的超时时间（秒）
+    PROBE_TIMEOUT = 30  # 解释器探测的超时时间（秒）
     INSTALL_TIMEOUT = 300  # 安装包的超时时间（秒）
+    PROBE_CACHE_NAME = "interpreters.json"
+    PROBE_CACHE_VERSION = 2
+    # 打包工具模块名 -> 发行包名
+    TOOL_DISTRIBUTIONS = {"nuitka": "nuitka", "PyInstaller": "pyinstaller"}
     
     def __init__(self):
         self.python_path = sys.executable
         self._cached_installed_packages = None
+        self._interpreter_info = None
+        self._import_maps = None
+        self.wheelhouse_dir = None  # 可选的本地 wheel 目录（设置后离线安装）
+        self.installer_choice = os.environ.get("PACKER_INSTALLER", "auto")  # 安装后端: auto（有 uv 时使用 uv）/ pip / uv
+        self.set_wheelhouse(os.environ.get("PACKER_WHEELHOUSE", ""))
         
     def set_python_path(self, path):
         if os.path.exists(path):
             self.python_path = path
             self._cached_installed_packages = None
+            self._interpreter_info = None
+            self._import_maps = None
             return True
         return False
 
+    def get_installer(self, signal=None):
+        """当前使用的安装后端：auto 时本地有 uv 就用 uv，否则回退到 pip；指定 uv 但找不到时记录回退"""
+        if self.installer_choice in ("auto", "uv"):
+            uv_path = find_uv()
+            if uv_path:
+                return UvInstaller(self.python_path, uv_path)
+            if self.installer_choice == "uv" and signal:
+                signal.emit("警告: 指定了 uv 安装后端（PACKER_INSTALLER=uv），但 tools/ 和 PATH 中都没有 uv，改用 pip\n")
+        return PipInstaller(self.python_path)
+
+    def set_wheelhouse(self, path):
+        """设置离线 wheel 目录，空字符串或不存在的目录表示使用在线镜像"""
+        path = path.strip() if path else ""
+        self.wheelhouse_dir = path if path and os.path.isdir(path) else None
+        self._import_maps = None
+        return self.wheelhouse_dir is not None
+
+    def get_wheelhouse_manifest(self):
+        """离线 wheel 目录中可用的发行包 {规范化包名: [版本, ...]}，未配置时返回 None"""
+        if not self.wheelhouse_dir:
+            return None
+        return DIST_INDEX.wheel_versions(self.wheelhouse_dir)
+
+    def split_offline_available(self, pkgs, signal=None):
+        """按离线 wheel 目录清单把包分为 (可提供, 不可提供)，未配置 wheel 目录时全部视为可提供"""
+        manifest = self.get_wheelhouse_manifest()
+        if manifest is None:
+            return list(pkgs), []
+        available, missing = [], []
+        for pkg in pkgs:
+            name = _canonical_name(_requirement_name(self.get_pip_name(pkg, signal)))
+            (available if name in manifest else missing).append(pkg)
+        return available, missing
+
+    def _probe_key(self):
+        """探测缓存的校验键：解释器修改时间（已安装的发行包由 DIST_INDEX 在进程内扫描，不影响探测结果）"""
+        return [_path_mtime(self.python_path)]
+
+    def get_interpreter_info(self, signal=None):
+        """获取目标解释器信息（版本、标准库、内置模块、sys.path、site-packages）。
+
+        一次启动目标解释器完成全部探测，结果按解释器路径缓存到磁盘，
+        解释器修改（重建虚拟环境、升级）后自动重新探测。失败时返回 None。
+        """
+        if self._interpreter_info is not None:
+            return self._interpreter_info
+        key = os.path.normcase(os.path.abspath(self.python_path))
+        cache = _load_json_cache(self.PROBE_CACHE_NAME) or {}
+        if cache.get("version") != self.PROBE_CACHE_VERSION:
+            cache = {"version": self.PROBE_CACHE_VERSION, "interpreters": {}}
+        entry = cache["interpreters"].get(key)
+        if entry and entry.get("key") == self._probe_key():
+            self._interpreter_info = entry["info"]
+            return self._interpreter_info
+        try:
+            result = subprocess.run(
+                [self.python_path, "-c", _INTERPRETER_PROBE_SCRIPT],
+                capture_output=True, text=True, encoding="utf-8", errors="replace",
+                timeout=self.PROBE_TIMEOUT,
+                startupinfo=_get_silent_startupinfo()
+            )
+            if result.returncode != 0:
+                if signal: signal.emit(f"警告: 探测解释器信息失败: {result.stderr.strip()}\n")
+                return None
+            import json
+            info = json.loads(result.stdout)
+        except subprocess.TimeoutExpired:
+            if signal: signal.emit("警告: 探测解释器信息超时\n")
+            return None
+        except Exception as e:
+            if signal: signal.emit(f"警告: 探测解释器信息失败: {e}\n")
+            return None
+        cache["interpreters"][key] = {"key": self._probe_key(), "info": info}
+        _save_json_cache(self.PROBE_CACHE_NAME, cache)
+        self._interpreter_info = info
+        return info
+
+    def get_stdlib_modules(self):
+        """目标解释器的标准库模块名集合（3.10+ 使用 sys.stdlib_module_names，否则回退到内置列表）"""
+        info = self.get_interpreter_info()
+        if info and info.get("stdlib"):
+            return set(info["stdlib"]) | set(info["builtins"])
+        return self.STANDARD_LIBS | set(sys.builtin_module_names)
+
+    def has_tool(self, module_name):
+        """目标解释器中是否安装了打包工具，无法探测时返回 None"""
+        if self.get_interpreter_info() is None:
+            return None
+        return self.TOOL_DISTRIBUTIONS.get(module_name, module_name).lower() in self._get_installed_packages()
+
     def get_python_version(self):
+        info = self.get_interpreter_info()
+        if info:
+            return info["version"]
         try:
             result = subprocess.run(
                 [self.python_path, "--version"],
@@ -580,13 +1668,48 @@ class EnvManager:
         except Exception:
             return "未知版本"
 
+    def get_installed_distributions(self, signal=None):
+        """已安装的发行包 {规范化包名: 版本}：在进程内直接扫描 site-packages 的 *.dist-info/*.egg-info，
+        按目录修改时间缓存，不启动 pip。无法确定 site-packages 时返回 None。"""
+        info = self.get_interpreter_info(signal)
+        if info is None:
+            return None
+        return DIST_INDEX.installed_versions(info["site_packages"])
+
+    def get_used_distributions(self, model, signal=None):
+        """项目实际用到的发行包：项目导入的第三方顶层模块所属的发行包，加上它们（递归）的无条件依赖。
+        返回 {规范化包名: (版本, 顶层模块名集合)}，无法确定 site-packages 时返回 None。"""
+        info = self.get_interpreter_info(signal)
+        if info is None:
+            return None
+        versions = DIST_INDEX.installed_versions(info["site_packages"])
+        graph = DIST_INDEX.installed_graph(info["site_packages"])
+        owners = {}
+        for dist, (tops, _) in graph.items():
+            for top in tops:
+                owners.setdefault(top, dist)
+        pending = [owners[root] for root in model.external_roots if root in owners]
+        used = {}
+        while pending:
+            dist = pending.pop()
+            if dist in used or dist not in graph:
+                continue
+            tops, requires = graph[dist]
+            used[dist] = (versions.get(dist, ""), set(tops))
+            pending.extend(requires)
+        return used
+
     def _get_installed_packages(self, signal=None):
-        """获取已安装的包列表（使用pip list缓存）"""
+        """获取已安装的包列表（进程内扫描 site-packages，无法探测解释器时回退到 pip list）"""
         if self._cached_installed_packages is not None:
             return self._cached_installed_packages
+        installed = self.get_installed_distributions(signal)
+        if installed is not None:
+            self._cached_installed_packages = set(installed)
+            return self._cached_installed_packages
         try:
             result = subprocess.run(
-                [self.python_path, "-m", "pip", "list", "--format=freeze"],
+                self.get_installer(signal).list_cmd(),
                 capture_output=True, text=True,
                 timeout=self.CHECK_TIMEOUT,
                 startupinfo=_get_silent_startupinfo()
@@ -595,7 +1718,7 @@ class EnvManager:
                 packages = set()
                 for line in result.stdout.strip().split('\n'):
                     if '==' in line:
-                        packages.add(line.split('==')[0].lower())
+                        packages.add(_canonical_name(line.split('==')[0]))
                 self._cached_installed_packages = packages
                 return packages
         except subprocess.TimeoutExpired:
@@ -607,128 +1730,521 @@ class EnvManager:
     # 清华大学 PyPI 镜像源
     TSINGHUA_MIRROR = "https://pypi.tuna.tsinghua.edu.cn/simple"
     
+    def get_import_maps(self, signal=None):
+        """返回 (已安装的 导入名->发行包 映射, wheelhouse 的 导入名->发行包 映射)，直接读取元数据，不启动子进程"""
+        if self._import_maps is None:
+            info = self.get_interpreter_info(signal)
+            site_dirs = info["site_packages"] if info else []
+            self._import_maps = DIST_INDEX.refresh(site_dirs, self.wheelhouse_dir)
+        return self._import_maps
+
+    def get_pip_name(self, pkg, signal=None):
+        """导入名对应的发行包名：优先元数据索引（已安装环境、wheelhouse），其次内置映射"""
+        installed_map, wheel_map = self.get_import_maps(signal)
+        for mapping in (installed_map, wheel_map):
+            dists = mapping.get(pkg)
+            if dists:
+                # 多个发行包提供同一导入名时（如 PyQt6 与 PyQt6-sip），优先同名的发行包
+                same = [d for d in dists if _canonical_name(d) == _canonical_name(pkg)]
+                return (same or dists)[0]
+        return self.PACKAGE_MAP.get(pkg, pkg)
+
     def install_package(self, pkg, signal):
         """安装指定的包，带超时和进度反馈，使用清华镜像源加速"""
-        pip_pkg_name = self.PACKAGE_MAP.get(pkg, pkg)
-        cmd = [self.python_path, "-m", "pip", "install", pip_pkg_name,
-               "-i", self.TSINGHUA_MIRROR, "--trusted-host", "pypi.tuna.tsinghua.edu.cn"]
-        signal.emit(f"安装依赖 (使用清华源): {' '.join(cmd)}\n")
+        return not self.install_packages([pkg], signal)
+
+    def install_packages(self, pkgs, signal, progress=None, is_cancelled=None):
+        """在一次 pip 调用（一次依赖解析）中安装全部选中的包，返回安装失败的包列表。
+
+        从 pip 输出中解析每个包的进度（通过 progress 回调报告），结束后重新扫描
+        site-packages 逐个确认安装结果（包名存在且已安装版本满足需求中的版本约束），并给出 pip 报告的失败原因。
+        """
+        import re
+        # 配置了离线 wheel 目录时，目录中没有的包直接失败，不再等待安装超时
+        pkgs, unavailable = self.split_offline_available(pkgs, signal)
+        for pkg in unavailable:
+            signal.emit(f"安装依赖 {pkg} 失败: 离线 wheel 目录 {self.wheelhouse_dir} 中没有 {self.get_pip_name(pkg, signal)}\n")
+        if not pkgs:
+            return unavailable
+        specs = {pkg: self.get_pip_name(pkg, signal) for pkg in pkgs}
+        wanted = {_canonical_name(_requirement_name(spec)): pkg for pkg, spec in specs.items()}
+        installer = self.get_installer(signal)
+        if self.wheelhouse_dir:
+            source_args = installer.source_args(find_links=self.wheelhouse_dir)
+            source_desc = f"离线 wheel 目录 {self.wheelhouse_dir}"
+        else:
+            source_args = installer.source_args(self.TSINGHUA_MIRROR, "pypi.tuna.tsinghua.edu.cn")
+            source_desc = "清华源"
+        cmd = installer.install_cmd(specs.values(), source_args)
+        signal.emit(f"批量安装 {len(pkgs)} 个依赖 (安装后端 {installer.name}，使用{source_desc}): {' '.join(cmd)}\n")
+        timeout = self.INSTALL_TIMEOUT + 60 * (len(pkgs) - 1)
+        # pip 在线安装输出 Collecting <需求>，离线安装输出 Processing <wheel 路径>；uv 输出 " + 包名==版本"
+        collecting = re.compile(r"^(?:Collecting|Processing|\s*\+) (\S+)")
+        # pip: "... satisfies the requirement foo" / "No matching distribution found for foo"；
+        # uv: "Because foo==1.0 depends on ..." / "Because foo was not found ..." / "Because there is no version of foo==9"
+        #     / "Because only foo<=2.0 is available ..." / "Because all versions of foo depend on ..."
+        failed_req = re.compile(r"(?:satisfies the requirement|No matching distribution found for) (\S+)"
+                                r"|Because (?:there (?:is|are) no versions? of |only |all versions of )?"
+                                r"([A-Za-z0-9][A-Za-z0-9._-]*)")
+        errors = {}
+        done = 0
+        start_time = time.time()
         try:
             process = subprocess.Popen(
                 cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
-                text=True, bufsize=1, universal_newlines=True,
+                env=dict(os.environ, PYTHONIOENCODING="utf-8"),
                 startupinfo=_get_silent_startupinfo()
             )
-            start_time = time.time()
-            while True:
-                if time.time() - start_time > self.INSTALL_TIMEOUT:
+            # 没有新输出时读取器每 0.5 秒产出一次 None，借此检查超时和取消
+            for line in OutputReader(process.stdout).lines():
+                if time.time() - start_time > timeout:
+                    process.kill()
+                    signal.emit(f"批量安装超时（超过 {timeout} 秒）\n")
+                    break
+                if is_cancelled and is_cancelled():
                     process.kill()
-                    signal.emit(f"安装依赖 {pkg} 超时（超过 {self.INSTALL_TIMEOUT} 秒）\n")
-                    return False
+                    signal.emit("依赖安装已取消\n")
+                    break
                 try:
-                    line = process.stdout.readline()
                     if line:
                         signal.emit(line)
-                    elif process.poll() is not None:
-                        break
+                        match = collecting.match(line)
+                        if match:
+                            req = match.group(1)
+                            if req.endswith(".whl"):
+                                req = os.path.basename(req).split("-")[0]
+                            pkg = wanted.get(_canonical_name(_requirement_name(req)))
+                            if pkg and progress:
+                                done += 1
+                                progress(f"处理依赖 ({done}/{len(pkgs)}): {pkg}")
+                        elif line.startswith(("Installing collected packages", "Prepared")) and progress:
+                            progress(f"正在安装 {len(pkgs)} 个依赖...")
+                        match = failed_req.search(line)
+                        if match:
+                            req = match.group(1) or match.group(2)
+                            name = _canonical_name(_requirement_name(req))
+                            errors[wanted.get(name, req)] = line.strip()
                 except Exception:
+                    process.kill()
                     break
-            self._cached_installed_packages = None
-            if process.returncode == 0:
+            process.wait()
+        except Exception as e:
+            signal.emit(f"批量安装依赖时发生异常: {e}\n")
+        # 以 site-packages 的实际内容为准逐个确认
+        self.clear_cache()
+        installed = self._get_installed_packages(signal)
+        versions = self.get_installed_distributions(signal) or {}
+        failed = []
+        for canonical, pkg in wanted.items():
+            version = versions.get(canonical)
+            if canonical in installed and (version is None or _requirement_satisfied(specs[pkg], version)):
                 signal.emit(f"依赖 {pkg} 安装成功\n")
-                return True
+                continue
+            failed.append(pkg)
+            if pkg in errors:
+                reason = errors[pkg]
+            elif canonical in installed:
+                # plan_sync 给出的版本不符需求（如 pkg==X）安装失败时，旧版本仍在环境中
+                reason = f"已安装版本 {version} 不满足 {specs[pkg]}"
             else:
-                signal.emit(f"安装依赖 {pkg} 失败，退出码: {process.returncode}\n")
-                return False
+                reason = "未在本次安装中完成（同一事务中其他包失败时 pip 不会安装任何包）"
+            signal.emit(f"安装依赖 {pkg} 失败: {reason}\n")
+        signal.emit(f"批量安装用时 {time.time() - start_time:.1f} 秒（安装后端 {installer.name}）\n")
+        return unavailable + failed
+
+    def plan_sync(self, script_path, signal=None):
+        """按入口脚本旁的 uv.lock / requirements*.txt / pyproject.toml 计算需要安装的差异。
+
+        已安装版本来自进程内的 site-packages 扫描，环境已就绪时不会启动任何子进程。
+        没有依赖声明文件时返回 None，否则返回需要安装的需求字符串列表。
+        """
+        info = self.get_interpreter_info(signal)
+        try:
+            declared = ProjectRequirements.find(script_path, info["version"] if info else None)
         except Exception as e:
-            signal.emit(f"安装依赖 {pkg} 时发生异常: {e}\n")
-            return False
+            if signal: signal.emit(f"警告: 读取依赖声明失败: {e}\n")
+            return None
+        if declared is None:
+            return None
+        installed = self.get_installed_distributions(signal) or {}
+        missing, mismatched = declared.diff(installed)
+        if signal:
+            signal.emit(f"依据 {declared.source} 同步: 声明 {len(declared.requirements)} 个发行包，"
+                        f"缺失 {len(missing)} 个，版本不符 {len(mismatched)} 个\n")
+            for req in mismatched:
+                signal.emit(f"  版本不符: {req['name']} 已安装 {installed.get(_canonical_name(req['name']))}，需要 {req['specifier']}\n")
+        return [req["spec"] for req in missing + mismatched]
 
-    def check_package_installed(self, pkg, signal=None):
-        """检查包是否已安装，使用缓存和超时机制"""
-        installed_packages = self._get_installed_packages(signal)
-        pip_pkg_name = self.PACKAGE_MAP.get(pkg, pkg).lower()
-        if pip_pkg_name in installed_packages or pkg.lower() in installed_packages:
-            return True
+    def resolve_imports(self, modules, signal=None):
+        """在一个子进程中批量解析顶层模块，返回 {模块名: (状态, 说明)}，状态为 found/missing/error。
+
+        只使用 importlib.util.find_spec 定位模块，不会执行模块代码。
+        """
+        modules = sorted(set(modules))
+        if not modules:
+            return {}
+        import json
+        start = time.time()
         try:
             result = subprocess.run(
-                [self.python_path, "-c", f"import {pkg}"],
-                capture_output=True, timeout=self.CHECK_TIMEOUT,
+                [self.python_path, "-c", _RESOLVE_IMPORTS_SCRIPT, json.dumps(modules)],
+                capture_output=True, text=True, encoding="utf-8", errors="replace",
+                timeout=self.CHECK_TIMEOUT,
                 startupinfo=_get_silent_startupinfo()
             )
-            return result.returncode == 0
+            if result.returncode != 0:
+                raise RuntimeError(result.stderr.strip() or f"退出码 {result.returncode}")
+            resolved = {name: tuple(value) for name, value in json.loads(result.stdout).items()}
         except subprocess.TimeoutExpired:
-            if signal: signal.emit(f"警告: 检查包 {pkg} 是否安装超时\n")
-            return False
-        except Exception:
-            return False
+            if signal: signal.emit(f"警告: 批量检查 {len(modules)} 个模块超时\n")
+            return {name: ("error", "超时") for name in modules}
+        except Exception as e:
+            if signal: signal.emit(f"警告: 批量检查模块失败: {e}\n")
+            return {name: ("error", str(e)) for name in modules}
+        if signal:
+            found = sum(1 for status, _ in resolved.values() if status == "found")
+            signal.emit(f"批量解析 {len(modules)} 个模块（找到 {found} 个），用时 {time.time() - start:.2f} 秒\n")
+        return resolved
+
+    def check_packages_installed(self, pkgs, signal=None):
+        """批量检查包是否已安装：先查元数据索引和已安装发行包列表，未命中的一次性交给 resolve_imports"""
+        installed_packages = self._get_installed_packages(signal)
+        installed_map, _ = self.get_import_maps(signal)
+        status = {}
+        unresolved = []
+        for pkg in pkgs:
+            pip_pkg_name = _canonical_name(_requirement_name(self.get_pip_name(pkg, signal)))
+            if pkg in installed_map or pip_pkg_name in installed_packages or _canonical_name(pkg) in installed_packages:
+                status[pkg] = True
+            else:
+                unresolved.append(pkg)
+        for pkg, (state, detail) in self.resolve_imports(unresolved, signal).items():
+            status[pkg] = state == "found"
+            if state == "error" and signal:
+                signal.emit(f"警告: 检查包 {pkg} 时出错: {detail}\n")
+        return status
+
+    def check_package_installed(self, pkg, signal=None):
+        """检查包是否已安装，使用缓存和超时机制"""
+        return self.check_packages_installed([pkg], signal).get(pkg, False)
 
     def parse_dependencies(self, script_path, signal):
-        """解析脚本的依赖，排除标准库"""
+        """解析整个项目（入口脚本及其引用的本地模块）的第三方依赖，排除标准库和本地模块"""
+        model = PROJECT_ANALYZER.analyze(script_path, signal)
+        for error in model.errors:
+            signal.emit(f"脚本语法错误，无法解析依赖: {error}\n")
+        if model.local_modules:
+            signal.emit(f"已识别本地模块: {', '.join(sorted(model.local_modules))}\n")
         dependencies = set()
-        all_standard_libs = self.STANDARD_LIBS.copy()
-        all_standard_libs.update(sys.builtin_module_names)
-        try:
-            with open(script_path, "r", encoding="utf-8") as f:
-                tree = ast.parse(f.read(), filename=script_path)
-            for node in ast.walk(tree):
-                if isinstance(node, ast.Import):
-                    for alias in node.names:
-                        module_name = alias.name.split('.')[0]
-                        if module_name not in all_standard_libs:
-                            dependencies.add(module_name)
-                elif isinstance(node, ast.ImportFrom):
-                    if node.module:
-                        module_name = node.module.split('.')[0]
-                        if module_name not in all_standard_libs:
-                            dependencies.add(module_name)
-        except SyntaxError as e:
-            signal.emit(f"脚本语法错误，无法解析依赖: {e}\n")
-        except Exception as e:
-            signal.emit(f"解析依赖时发生错误: {e}\n")
-        return sorted(list(dependencies))
+        for root in model.third_party_roots(self.get_stdlib_modules()):
+            if root in self.NAMESPACE_PACKAGES:
+                subs = {".".join(name.split(".")[:2]) for name in model.external_imports
+                        if name.startswith(root + ".")}
+                dependencies.update(subs or {root})
+            else:
+                dependencies.add(root)
+        return sorted(dependencies)
     
     def clear_cache(self):
-        """清除包缓存"""
+        """清除包缓存（解释器信息与导入名索引会按磁盘缓存重新校验）"""
         self._cached_installed_packages = None
+        self._interpreter_info = None
+        self._import_maps = None
+
+# ===========================
+# 第三方包精简规则
+# ===========================
+# 规则库版本：修改规则后递增，构建日志中会注明使用的版本
+ANTI_BLOAT_RULES_VERSION = 2
+
+# 发行包（规范化名称）-> 精简规则列表。依赖扫描显示项目用到该发行包（直接或间接）时自动应用。
+# 目标只能是该发行包自身的模块，不能排除其他发行包（它们可能被项目或其他依赖使用）：
+#   nofollow: Nuitka --nofollow-import-to 目标（可含通配符）
+#   exclude:  PyInstaller --exclude-module 目标（只能是确切模块名，缺省取 nofollow 中不含通配符的项）
+#   options:  额外的 Nuitka 参数（--noinclude-* 等）
+#   versions: 适用的版本范围（PEP 440），缺省表示所有版本
+#   savings:  预计收益，写入构建日志
+# 项目直接导入的模块不会被排除。
+ANTI_BLOAT_RULES = {
+    "pillow": [
+        {"id": "pil-gui-bridges",
+         "nofollow": ["PIL.ImageQt", "PIL.ImageTk", "PIL._tkinter_finder", "PIL.ImageShow"],
+         "savings": "避免经由 ImageQt/ImageTk 拉入 Qt 绑定或 tkinter（数百个模块及 Tcl/Tk 运行时）"},
+    ],
+    "matplotlib": [
+        {"id": "matplotlib-backends",
+         "nofollow": ["matplotlib.backends.backend_tkagg", "matplotlib.backends.backend_tkcairo",
+                      "matplotlib.backends._backend_tk", "matplotlib.backends.backend_wx",
+                      "matplotlib.backends.backend_wxagg", "matplotlib.backends.backend_wxcairo",
+                      "matplotlib.backends.backend_gtk3", "matplotlib.backends.backend_gtk3agg",
+                      "matplotlib.backends.backend_gtk4", "matplotlib.backends.backend_gtk4agg",
+                      "matplotlib.backends.backend_webagg", "matplotlib.backends.backend_webagg_core",
+                      "matplotlib.backends.backend_nbagg", "matplotlib.backends.backend_macosx"],
+         "savings": "不编译 Tk/Wx/GTK/WebAgg/nbagg 等用不到的绘图后端，避免拉入 tornado 和 GUI 工具包"},
+        {"id": "matplotlib-tests",
+         "nofollow": ["matplotlib.tests", "matplotlib.testing", "mpl_toolkits.*.tests"],
+         "options": ["--noinclude-data-files=matplotlib/mpl-data/sample_data/*"],
+         "savings": "去掉测试代码和示例数据（约 2 MB 数据文件）"},
+    ],
+    "numpy": [
+        {"id": "numpy-tests",
+         "nofollow": ["numpy.tests", "numpy.*.tests", "numpy.conftest"],
+         "savings": "去掉 numpy 测试套件（约 100 个模块）"},
+        {"id": "numpy-build-tools",
+         "nofollow": ["numpy.f2py", "numpy.distutils"],
+         "savings": "去掉 f2py 和 numpy.distutils 构建工具（约 80 个模块，并避免拉入 setuptools）"},
+    ],
+    "scipy": [
+        {"id": "scipy-tests",
+         "nofollow": ["scipy.*.tests"],
+         "savings": "去掉 scipy 各子包的测试套件（约 500 个模块）"},
+        {"id": "scipy-array-api-backends",
+         "nofollow": ["scipy._lib.array_api_compat.torch", "scipy._lib.array_api_compat.cupy",
+                      "scipy._lib.array_api_compat.dask"],
+         "versions": ">=1.11",
+         "savings": "不跟踪 array API 兼容层中的 torch/cupy/dask 后端（已安装时可避免拉入整个深度学习框架）"},
+    ],
+    "pandas": [
+        {"id": "pandas-tests",
+         "nofollow": ["pandas.tests", "pandas.conftest"],
+         "savings": "去掉 pandas 测试套件（约 1000 个模块）"},
+    ],
+}
+
+
+def select_anti_bloat_rules(model, used):
+    """根据依赖扫描结果选出适用的精简规则，返回 [(规则, nofollow 目标, exclude 目标)]。
+
+    used 为 EnvManager.get_used_distributions 的结果：项目导入的发行包及其递归依赖
+    （numpy/scipy 等通常是间接依赖），只对其中的发行包应用规则。
+    目标只保留属于该发行包自身顶层模块的部分，项目直接导入的模块（及其父包）也从目标中去掉。
+    """
+    if not used:
+        return []
+    direct = model.external_imports if model else set()
+    pkg = _load_packaging()
+
+    selected = []
+    for dist, rules in ANTI_BLOAT_RULES.items():
+        if dist not in used:
+            continue
+        version, tops = used[dist]
+
+        def keep(name):
+            return (name.split(".")[0] in tops
+                    and not any(imp == name or imp.startswith(name + ".") for imp in direct))
+
+        for rule in rules:
+            if rule.get("versions") and pkg:
+                try:
+                    if not pkg[2].SpecifierSet(rule["versions"]).contains(version, prereleases=True):
+                        continue
+                except Exception:
+                    pass
+            nofollow = [n for n in rule["nofollow"] if keep(n)]
+            exclude = [n for n in rule.get("exclude", [n for n in nofollow if "*" not in n]) if keep(n)]
+            if nofollow or exclude or rule.get("options"):
+                selected.append((rule, nofollow, exclude))
+    return selected
 
 class BaseTool:
+    # 所有项目都排除的测试框架
+    STATIC_EXCLUSIONS = ("pytest", "unittest", "_pytest", "hypothesis")
+    applied_rules = ()  # 本次构建应用的精简规则 [(规则, nofollow 目标, exclude 目标)]
+    build_dir = None  # 构建期间可观察的中间目录（Nuitka 的 *.build），用于计算编译进度
+    base_cmd = None  # 增量改写前的完整参数，构建历史据此区分配置
+    profile_exclusions = ()  # 本次构建合并的项目排除项
+    MAX_WORKSPACES = 6  # 每个打包工具保留的增量构建目录数（按最近使用淘汰）
     def __init__(self, env): self.env = env
     def check_installed(self):
+        installed = self.env.has_tool(self.module_name)
+        if installed is not None: return installed
         try: subprocess.check_call([self.env.python_path, "-c", f"import {self.module_name}"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL); return True
         except: return False
-    def find_upx(self):
-        base = BASE_DIR; tools = os.path.join(base, "tools")
-        if not os.path.exists(tools): return None
-        for r, d, f in os.walk(tools):
-            if "upx.exe" in f: return r
-        return None
+    def find_upx(self): return TOOL_INDEX.find("upx")
+    def post_build(self, success, log):
+        """打包进程结束后的处理（在工作线程中执行），返回最终是否成功"""
+        return success
+    def artifact_names(self, target):
+        """输出目录中属于本次构建产物的文件/目录名"""
+        return []
+    def uses_tkinter(self, target):
+        """项目（含本地模块）是否导入了 tkinter"""
+        try:
+            return "tkinter" in PROJECT_ANALYZER.analyze(target).external_roots
+        except Exception:
+            return True
+    def select_profile(self, target):
+        """读取项目排除配置中本次构建要合并的排除项"""
+        try:
+            return ExclusionProfile.load(target).exclusions(PROJECT_ANALYZER.analyze(target))
+        except Exception:
+            return []
+    def _workspace_dir(self, tool_dir, target, config):
+        """增量构建目录 <工具>/<入口名-项目哈希>/<配置哈希>。
+
+        配置哈希同时包含目标解释器的路径和版本，不同解释器/虚拟环境不会共用同一目录。
+        取用时更新目录的修改时间，并淘汰该工具下最久未使用的目录。
+        """
+        import hashlib
+        target = os.path.abspath(target)
+        project_key = hashlib.sha1(os.path.normcase(target).encode("utf-8")).hexdigest()[:12]
+        info = self.env.get_interpreter_info()
+        interpreter = [os.path.normcase(os.path.abspath(self.env.python_path)), info["version"] if info else ""]
+        config_key = hashlib.sha1("\0".join(interpreter + list(config)).encode("utf-8")).hexdigest()[:12]
+        base_name = os.path.splitext(os.path.basename(target))[0]
+        path = get_cache_dir(tool_dir, f"{base_name}-{project_key}", config_key)
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self._evict_workspaces(tool_dir)
+        return path
+    def _evict_workspaces(self, tool_dir):
+        root = get_cache_dir(tool_dir)
+        entries = []
+        for project in os.scandir(root):
+            if project.is_dir():
+                entries.extend(e for e in os.scandir(project.path) if e.is_dir())
+        entries.sort(key=lambda e: e.stat().st_mtime, reverse=True)
+        for e in entries[self.MAX_WORKSPACES:]:
+            shutil.rmtree(e.path, ignore_errors=True)
+            try:
+                os.rmdir(os.path.dirname(e.path))  # 项目下已没有其他配置时一并删除
+            except OSError:
+                pass
+    def select_rules(self, target):
+        """选出本次构建适用的第三方包精简规则"""
+        try:
+            model = PROJECT_ANALYZER.analyze(target)
+            self.applied_rules = select_anti_bloat_rules(model, self.env.get_used_distributions(model))
+        except Exception:
+            self.applied_rules = []
+        return self.applied_rules
 
 class PyInstallerTool(BaseTool):
-    def __init__(self, env): self.env = env; self.name = "PyInstaller"; self.module_name = "PyInstaller"
+    # 标准库中的测试、文档和开发工具（Nuitka 独立模式默认不包含，这里显式排除以保持一致）
+    STATIC_EXCLUSIONS = BaseTool.STATIC_EXCLUSIONS + ("test", "pydoc_data", "idlelib", "lib2to3", "ensurepip")
+    # UPX 压缩无收益或会导致加载失败的二进制文件（VC 运行时、Python DLL、Qt 平台插件）
+    UPX_EXCLUDE = ("vcruntime140.dll", "vcruntime140_1.dll", "msvcp140.dll", "msvcp140_1.dll", "ucrtbase.dll",
+                   "python3.dll", "qwindows.dll", "qminimal.dll", "qoffscreen.dll", "qdirect2d.dll")
+    # 带值的路径参数（计算工作目录配置时忽略）
+    PATH_OPTIONS = ("--distpath", "--specpath", "--workpath")
+    FINGERPRINT_FILE = "fingerprint.json"
+    def __init__(self, env, incremental=False):
+        self.env = env; self.name = "PyInstaller"; self.module_name = "PyInstaller"
+        self.incremental = incremental  # 增量构建：复用 spec 文件和 workpath（PyInstaller 自身的分析缓存）
+        self._workspace = None
+        self._fingerprint = None  # 本次构建需要写入工作目录的环境指纹（复用 spec 时为 None）
+    def get_workspace(self, target, cmd):
+        """增量构建目录：按项目（入口脚本路径）、目标解释器和配置（打包参数）区分，位于输出目录之外"""
+        raw_target, target = target, os.path.abspath(target)
+        config, skip_next = [], False
+        for arg in cmd[3:]:
+            if skip_next:
+                skip_next = False
+            elif arg in self.PATH_OPTIONS:
+                skip_next = True
+            elif arg not in (raw_target, target):
+                config.append(arg)
+        return self._workspace_dir("pyinstaller", target, config)
+    def _environment_fingerprint(self):
+        """解释器身份和已安装的依赖集合，变化时丢弃工作目录重新分析"""
+        import hashlib, json
+        info = self.env.get_interpreter_info()
+        payload = {
+            "python": [os.path.normcase(os.path.abspath(self.env.python_path)), _path_mtime(self.env.python_path),
+                       info["version"] if info else None],
+            "distributions": self.env.get_installed_distributions(),
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+    def _incremental_cmd(self, target, out, cmd):
+        """增量模式：工作目录有效时直接从 spec 构建，否则清空工作目录并以完整参数重新生成 spec"""
+        import json
+        self._workspace = self.get_workspace(target, cmd)
+        base_name = os.path.splitext(os.path.basename(target))[0]
+        spec = os.path.join(self._workspace, f"{base_name}.spec")
+        workpath = os.path.join(self._workspace, "work")
+        fingerprint = self._environment_fingerprint()
+        try:
+            with open(os.path.join(self._workspace, self.FINGERPRINT_FILE), "r", encoding="utf-8") as f:
+                valid = json.load(f).get("fingerprint") == fingerprint
+        except (OSError, ValueError):
+            valid = False
+        if valid and os.path.isfile(spec):
+            self._fingerprint = None
+            # 从 spec 构建时只允许指定输出路径和 UPX 目录，其余选项都已写在 spec 中
+            spec_cmd = cmd[:3] + ["--noconfirm", "--distpath", out, "--workpath", workpath]
+            if "--upx-dir" in cmd:
+                spec_cmd += ["--upx-dir", cmd[cmd.index("--upx-dir") + 1]]
+            return spec_cmd + [spec]
+        shutil.rmtree(self._workspace, ignore_errors=True)
+        os.makedirs(self._workspace, exist_ok=True)
+        self._fingerprint = fingerprint
+        cmd[cmd.index("--specpath") + 1] = self._workspace
+        cmd[cmd.index("--workpath") + 1] = workpath
+        return cmd
+    def post_build(self, success, log):
+        """增量模式下构建成功后记录环境指纹，下次构建据此判断能否复用 spec 和 workpath"""
+        if success and self._workspace and self._fingerprint:
+            import json
+            try:
+                with open(os.path.join(self._workspace, self.FINGERPRINT_FILE), "w", encoding="utf-8") as f:
+                    json.dump({"fingerprint": self._fingerprint}, f)
+            except OSError as e:
+                log(f"记录增量构建指纹失败: {e}\n")
+        return success
+    def _upx_args(self, upx_dir):
+        """启用 UPX 时的参数：指定 UPX 目录并跳过压缩无益的二进制文件"""
+        args = ["--upx-dir", upx_dir]
+        names = list(self.UPX_EXCLUDE)
+        info = self.env.get_interpreter_info()
+        if info:
+            major, minor = info["version"].split()[-1].split(".")[:2]
+            names.append(f"python{major}{minor}.dll")
+        for name in names:
+            args.extend(["--upx-exclude", name])
+        return args
+    def artifact_names(self, target):
+        base_name = os.path.splitext(os.path.basename(target))[0]
+        return [f"{base_name}.exe" if sys.platform == "win32" else base_name]
     def get_cmd(self, target, out, nocon, icon, compress_mode):
         """
         compress_mode: 0=双层压缩, 1=仅内压缩, 2=仅UPX, 3=不压缩
         """
         if not os.path.exists(out): os.makedirs(out)
-        cmd = [self.env.python_path, "-m", "PyInstaller", "-F", target, "--distpath", out, "--specpath", out, "--workpath", os.path.join(out, "build_temp")]
+        cmd = [self.env.python_path, "-m", "PyInstaller", "--noconfirm", "-F", target, "--distpath", out, "--specpath", out, "--workpath", os.path.join(out, "build_temp")]
         if nocon: cmd.append("-w")
         if icon: cmd.extend(["--icon", icon])
         
+        # 排除模型与 Nuitka 一致：内置排除项、未使用时排除 tkinter、项目排除配置、第三方包精简规则
+        excludes = list(self.STATIC_EXCLUSIONS)
+        if not self.uses_tkinter(target): excludes += ["tkinter", "_tkinter"]
+        self.profile_exclusions = self.select_profile(target)
+        excludes += self.profile_exclusions
+        for _, _, exclude in self.select_rules(target): excludes += exclude
+        for name in dict.fromkeys(excludes): cmd.extend(["--exclude-module", name])
+        
         # 压缩模式处理
         if compress_mode == 0:  # 双层压缩：内压缩 + UPX
             u = self.find_upx()
-            if u: cmd.extend(["--upx-dir", u])
+            if u: cmd.extend(self._upx_args(u))
             else: cmd.append("--noupx")
         elif compress_mode == 1:  # 仅内压缩：禁用UPX
             cmd.append("--noupx")
         elif compress_mode == 2:  # 仅UPX：PyInstaller内压缩无法完全禁用，但启用UPX
             u = self.find_upx()
-            if u: cmd.extend(["--upx-dir", u])
+            if u: cmd.extend(self._upx_args(u))
             else: cmd.append("--noupx")
         else:  # 不压缩：禁用UPX
             cmd.append("--noupx")
         
+        # 增量构建：spec 和 workpath 放在输出目录之外的持久化工作目录中
+        self._workspace = None
+        self.base_cmd = list(cmd)
+        if self.incremental:
+            cmd = self._incremental_cmd(target, out, cmd)
+        
         return cmd, None
 
 class NuitkaTool(BaseTool):
@@ -743,12 +2259,160 @@ class NuitkaTool(BaseTool):
         'wx': {'plugin': 'wx', 'package': 'wx'},
     }
     
-    def __init__(self, env, backend_choice=0, parallel_jobs=None):
+    # Qt 子模块 -> 运行时需要的 Qt 插件目录
+    QT_SUBMODULE_PLUGINS = {
+        'QtGui': ('platforms', 'imageformats', 'iconengines'),
+        'QtWidgets': ('platforms', 'styles', 'platformthemes'),
+        'QtSvg': ('imageformats', 'iconengines'),
+        'QtSvgWidgets': ('imageformats', 'iconengines'),
+        'QtPrintSupport': ('printsupport',),
+        'QtSql': ('sqldrivers',),
+        'QtNetwork': ('tls', 'networkinformation', 'bearer'),
+        'QtMultimedia': ('multimedia', 'mediaservice', 'audio'),
+        'QtPositioning': ('position',),
+        'QtSensors': ('sensors',),
+        'QtTextToSpeech': ('texttospeech',),
+        'QtQuick': ('qmltooling', 'scenegraph'),
+    }
+    # 子模块隐含依赖的其他子模块（QtWidgets 依赖 QtGui，QtGui 依赖 QtCore），计算插件时先展开
+    QT_MODULE_DEPENDS = {
+        'QtGui': ('QtCore',),
+        'QtWidgets': ('QtGui',),
+        'QtSvg': ('QtGui',),
+        'QtSvgWidgets': ('QtSvg', 'QtWidgets'),
+        'QtPrintSupport': ('QtWidgets',),
+        'QtOpenGL': ('QtGui',),
+        'QtOpenGLWidgets': ('QtOpenGL', 'QtWidgets'),
+        'QtQml': ('QtNetwork',),
+        'QtQuick': ('QtQml', 'QtGui'),
+        'QtQuickWidgets': ('QtQuick', 'QtWidgets'),
+        'QtMultimedia': ('QtGui', 'QtNetwork'),
+        'QtMultimediaWidgets': ('QtMultimedia', 'QtWidgets'),
+        'QtCharts': ('QtWidgets',),
+        'QtDataVisualization': ('QtGui',),
+        'QtWebEngineCore': ('QtQuick', 'QtNetwork'),
+        'QtWebEngineWidgets': ('QtWebEngineCore', 'QtWidgets', 'QtPrintSupport'),
+        'QtNetwork': ('QtCore',),
+    }
+    QT5_ONLY_PLUGINS = {'bearer', 'mediaservice', 'audio'}
+    QT6_ONLY_PLUGINS = {'tls', 'networkinformation', 'multimedia'}
+    # Nuitka 默认（sensible）包含的插件目录，精简模式下排除其中用不到的
+    QT_SENSIBLE_PLUGINS = ('imageformats', 'iconengines', 'mediaservice', 'printsupport',
+                           'platforms', 'platformthemes', 'styles', 'tls')
+    # 只有用到 OpenGL/Quick/3D 等模块时才需要的 DLL（软件 OpenGL 渲染、D3D 着色器编译器）
+    QT_GL_MODULES = ('QtOpenGL', 'QtOpenGLWidgets', 'QtQuick', 'QtQuickWidgets', 'QtQml', 'Qt3DCore',
+                     'QtWebEngineCore', 'QtWebEngineWidgets', 'QtDataVisualization', 'QtCharts')
+    QT_GL_DLLS = ('*opengl32sw.dll', '*d3dcompiler_*.dll')
+    
+    # 不影响生成的 C 代码、计算增量构建配置时忽略的参数前缀
+    WORKSPACE_IGNORED_ARGS = ("--jobs=", "--output-dir=", "--remove-output", "--report=")
+    CCACHE_MAX_SIZE = "5G"  # 编译缓存目录大小上限
+    
+    def __init__(self, env, backend_choice=0, parallel_jobs=None, incremental=False, slim_qt=False):
         self.env = env
         self.name = "Nuitka"
         self.module_name = "nuitka"
         self.backend_choice = backend_choice  # 0=自动, 1=MSVC, 2=MinGW
         self.parallel_jobs = parallel_jobs  # 并行编译任务数
+        self.incremental = incremental  # 增量编译：保留构建目录供下次复用
+        self.slim_qt = slim_qt  # 精简 Qt：不打包翻译文件、未用到的插件和 OpenGL 相关 DLL
+        self.qt_modules = []  # 本次构建检测到的 Qt 子模块
+        self._workspace = None
+        self._target = None
+        self._out = None
+        self._ccache = None  # (ccache 路径, 构建环境)
+        self._report = None  # 本次构建的编译报告路径
+        self.report = None  # 最近一次的编译报告分析结果
+        self.profile_exclusions = []  # 本次构建合并的项目排除项
+        self.new_suggestions = []  # 本次构建新增的待确认排除建议
+    
+    @staticmethod
+    def find_ccache():
+        """查找 ccache：优先 tools/ 中内置的，其次系统 PATH"""
+        return TOOL_INDEX.find_exe("ccache") or shutil.which("ccache")
+    
+    @staticmethod
+    def _ccache_stats(ccache, env):
+        """读取 ccache 统计，返回 (命中数, 未命中数)，失败返回 None"""
+        try:
+            result = subprocess.run(
+                [ccache, "--print-stats"], capture_output=True, text=True, timeout=10,
+                env=env, startupinfo=_get_silent_startupinfo()
+            )
+            if result.returncode != 0:
+                return None
+            stats = {}
+            for line in result.stdout.splitlines():
+                key, _, value = line.partition("\t")
+                if value.strip().isdigit():
+                    stats[key.strip()] = int(value)
+            hits = stats.get("direct_cache_hit", 0) + stats.get("preprocessed_cache_hit", 0)
+            return hits, stats.get("cache_miss", 0)
+        except Exception:
+            return None
+    
+    def _setup_ccache(self, env):
+        """在构建环境中启用受管理的 ccache（MinGW 后端），返回是否启用"""
+        ccache = self.find_ccache()
+        if not ccache:
+            return False
+        env["NUITKA_CCACHE_BINARY"] = ccache
+        env["CCACHE_DIR"] = get_cache_dir("ccache")
+        env["CCACHE_MAXSIZE"] = self.CCACHE_MAX_SIZE
+        # 清零统计，构建结束后的统计即为本次构建的命中情况
+        try:
+            subprocess.run([ccache, "--zero-stats"], capture_output=True, timeout=10,
+                           env=env, startupinfo=_get_silent_startupinfo())
+        except Exception:
+            pass
+        self._ccache = (ccache, env)
+        return True
+    
+    def get_workspace(self, target, cmd):
+        """增量构建目录：按项目（入口脚本路径）、目标解释器和配置（影响编译结果的参数）区分，位于输出目录之外"""
+        raw_target, target = target, os.path.abspath(target)
+        config = [a for a in cmd[1:] if a not in (raw_target, target) and not a.startswith(self.WORKSPACE_IGNORED_ARGS)]
+        return self._workspace_dir("nuitka", target, config)
+    
+    def artifact_names(self, target):
+        return [f"{os.path.splitext(os.path.basename(target))[0]}.dist"]
+    
+    def post_build(self, success, log):
+        """报告编译缓存命中情况并分析编译报告；增量模式下把构建目录中的 *.dist 复制到输出目录（构建目录本身保留）"""
+        if self._ccache:
+            stats = self._ccache_stats(*self._ccache)
+            if stats:
+                hits, misses = stats
+                total = hits + misses
+                rate = hits * 100 // total if total else 0
+                log(f"编译缓存 (ccache): {total} 个编译单元中 {hits} 个命中缓存，{misses} 个重新编译（命中率 {rate}%）\n")
+        # 失败时 Nuitka 同样会写出报告，照常分析并更新项目排除配置
+        self.new_suggestions = []
+        if self._report and os.path.isfile(self._report):
+            try:
+                self.report = REPORT_ANALYZER.analyze(self._report, PROJECT_ANALYZER.analyze(self._target))
+                log(REPORT_ANALYZER.format_summary(self.report))
+                profile = ExclusionProfile.load(self._target)
+                learned, self.new_suggestions = profile.learn(self.report)
+                profile.save()
+                if learned:
+                    log(f"已加入项目排除配置（下次构建生效）: {', '.join(learned)}\n")
+            except Exception as e:
+                log(f"分析编译报告失败: {e}\n")
+        if not self.incremental or not self._workspace or not success:
+            return success
+        base_name = os.path.splitext(os.path.basename(self._target))[0]
+        src = os.path.join(self._workspace, f"{base_name}.dist")
+        dst = os.path.join(self._out, f"{base_name}.dist")
+        try:
+            if os.path.exists(dst):
+                shutil.rmtree(dst)
+            shutil.copytree(src, dst)
+            log(f"已将增量构建结果复制到: {dst}\n")
+            return True
+        except Exception as e:
+            log(f"复制增量构建结果失败: {e}\n")
+            return False
     
     def set_backend(self, choice):
         """设置编译后端选择"""
@@ -763,24 +2427,12 @@ class NuitkaTool(BaseTool):
             return 4  # 默认 4 核
     
     def _detect_gui_frameworks(self, target, signal=None):
-        """检测目标脚本使用的 GUI 框架"""
+        """检测目标项目（含本地模块）使用的 GUI 框架"""
         detected = []
         try:
-            with open(target, "r", encoding="utf-8") as f:
-                content = f.read()
-            tree = ast.parse(content, filename=target)
-            
-            imports = set()
-            for node in ast.walk(tree):
-                if isinstance(node, ast.Import):
-                    for alias in node.names:
-                        imports.add(alias.name.split('.')[0])
-                elif isinstance(node, ast.ImportFrom):
-                    if node.module:
-                        imports.add(node.module.split('.')[0])
-            
+            model = PROJECT_ANALYZER.analyze(target)
             for framework in self.GUI_FRAMEWORKS.keys():
-                if framework in imports:
+                if framework in model.external_roots:
                     detected.append(framework)
                     # 如果检测到框架有警告信息，输出到日志
                     config = self.GUI_FRAMEWORKS[framework]
@@ -790,6 +2442,54 @@ class NuitkaTool(BaseTool):
             pass
         return detected
     
+    def _qt_submodules(self, target, package):
+        """项目所有源文件中导入的 Qt 子模块（如 QtWidgets），按名称排序"""
+        try:
+            model = PROJECT_ANALYZER.analyze(target)
+        except Exception:
+            return []
+        prefix = package + "."
+        return sorted({imp[len(prefix):].split(".")[0] for imp in model.external_imports
+                       if imp.startswith(prefix) and imp[len(prefix):].startswith("Qt")})
+    
+    @classmethod
+    def _qt_closure(cls, modules):
+        """展开子模块的隐含依赖，返回包含依赖在内的子模块集合"""
+        closure = set()
+        pending = list(modules)
+        while pending:
+            name = pending.pop()
+            if name not in closure:
+                closure.add(name)
+                pending.extend(cls.QT_MODULE_DEPENDS.get(name, ()))
+        return closure
+    
+    def _qt_args(self, target, config):
+        """Qt 绑定的打包参数：只包含项目用到的子模块及其需要的插件，精简模式下去掉翻译和多余的 DLL"""
+        package = config['package']
+        self.qt_modules = self._qt_submodules(target, package)
+        if not self.qt_modules:
+            # 没有识别出具体子模块（例如只 import PyQt6），退回整包包含
+            return [f"--include-qt-plugins={config['qt_plugins']}", f"--include-package={package}"]
+        args = [f"--include-module={package}.{name}" for name in self.qt_modules]
+        excluded = self.QT5_ONLY_PLUGINS if package.endswith("6") else self.QT6_ONLY_PLUGINS
+        modules = sorted(self._qt_closure(self.qt_modules))
+        plugins = []
+        for name in modules:
+            for plugin in self.QT_SUBMODULE_PLUGINS.get(name, ()):
+                if plugin not in plugins and plugin not in excluded:
+                    plugins.append(plugin)
+        if plugins:
+            args.append(f"--include-qt-plugins={','.join(plugins)}")
+        if self.slim_qt:
+            args.append("--noinclude-qt-translations")
+            unused = [p for p in self.QT_SENSIBLE_PLUGINS if p not in plugins and p not in excluded]
+            if unused:
+                args.append(f"--noinclude-qt-plugins={','.join(unused)}")
+            if not any(name in self.QT_GL_MODULES for name in modules):
+                args += [f"--noinclude-dlls={pattern}" for pattern in self.QT_GL_DLLS]
+        return args
+    
     def get_cmd(self, target, out, nocon, icon, compress_mode):
         """
         compress_mode: 0=双层压缩, 1=仅内压缩, 2=仅UPX, 3=不压缩
@@ -821,10 +2521,18 @@ class NuitkaTool(BaseTool):
         # 2. 如果使用 MinGW 且有路径，注入环境变量
         if use_mingw and mingw_path and os.path.exists(mingw_path):
             env["PATH"] = mingw_path + os.pathsep + env["PATH"]
+        
+        # 2.1 MinGW 后端启用编译缓存（MSVC 由 Nuitka 内置的 clcache 处理）
+        self._ccache = None
+        if use_mingw:
+            self._setup_ccache(env)
             
         # 3. 准备输出
         if not os.path.exists(out): os.makedirs(out)
         
+        base_name = os.path.splitext(os.path.basename(target))[0]
+        self._report = os.path.join(out, f"{base_name}-report.xml")
+        
         # 4. 计算并行编译任务数
         jobs = self.parallel_jobs if self.parallel_jobs else self._get_cpu_count()
         
@@ -843,14 +2551,13 @@ class NuitkaTool(BaseTool):
             f"--jobs={jobs}",
             
             # --- 排除不需要的测试模块以减小体积和加快打包速度 ---
-            "--nofollow-import-to=pytest",
-            "--nofollow-import-to=unittest",
-            "--nofollow-import-to=_pytest",
-            "--nofollow-import-to=hypothesis",
+            *[f"--nofollow-import-to={name}" for name in self.STATIC_EXCLUSIONS],
             
             "--assume-yes-for-downloads",
             "--remove-output",
             f"--output-dir={out}",
+            # 编译报告：构建结束后分析耗时分布并给出排除建议
+            f"--report={self._report}",
             target
         ]
         
@@ -862,18 +2569,29 @@ class NuitkaTool(BaseTool):
                 if plugin_arg not in cmd:
                     cmd.insert(cmd.index("--assume-yes-for-downloads"), plugin_arg)
                 
-                # Qt 框架需要额外的插件配置
+                # Qt 框架按实际导入的子模块配置包含的模块和插件
                 if 'qt_plugins' in config:
-                    qt_arg = f"--include-qt-plugins={config['qt_plugins']}"
-                    if qt_arg not in cmd:
-                        cmd.insert(cmd.index("--assume-yes-for-downloads"), qt_arg)
-                    pkg_arg = f"--include-package={config['package']}"
-                    if pkg_arg not in cmd:
-                        cmd.insert(cmd.index("--assume-yes-for-downloads"), pkg_arg)
+                    for qt_arg in self._qt_args(target, config):
+                        if qt_arg not in cmd:
+                            cmd.insert(cmd.index("--assume-yes-for-downloads"), qt_arg)
         
         # 8. 如果没有检测到 tkinter，则排除它以加快打包速度
         if 'tkinter' not in detected_guis:
             cmd.insert(cmd.index("--assume-yes-for-downloads"), "--nofollow-import-to=tkinter")
+        
+        # 9. 合并项目排除配置（以往构建学习到的和用户接受的排除项）
+        self.profile_exclusions = []
+        for name in self.select_profile(target):
+            arg = f"--nofollow-import-to={name}"
+            if arg not in cmd:
+                cmd.insert(cmd.index("--assume-yes-for-downloads"), arg)
+                self.profile_exclusions.append(name)
+        
+        # 10. 第三方包精简规则
+        for rule, nofollow, _ in self.select_rules(target):
+            for arg in [f"--nofollow-import-to={name}" for name in nofollow] + rule.get("options", []):
+                if arg not in cmd:
+                    cmd.insert(cmd.index("--assume-yes-for-downloads"), arg)
 
         # 7. 添加编译后端参数
         if use_msvc:
@@ -909,9 +2627,745 @@ class NuitkaTool(BaseTool):
                 cmd.append("--disable-plugin=upx")
         else:  # 不压缩：禁用UPX
             cmd.append("--disable-plugin=upx")
+        
+        # 增量编译：输出到持久化的构建目录且不删除中间文件，未变化的 C 代码和目标文件在下次构建时复用
+        self._target, self._out, self._workspace = target, out, None
+        self.base_cmd = list(cmd)
+        if self.incremental:
+            self._workspace = self.get_workspace(target, cmd)
+            cmd.remove("--remove-output")
+            cmd[cmd.index(f"--output-dir={out}")] = f"--output-dir={self._workspace}"
+        self.build_dir = os.path.join(self._workspace or out, f"{base_name}.build")
             
         return cmd, env
 
+# ===========================
+# Nuitka 编译报告分析
+# ===========================
+class NuitkaReport:
+    """编译报告的统计结果"""
+    def __init__(self, path):
+        self.path = path
+        self.nuitka_version = ""
+        self.completion = ""
+        self.modules = {}        # 模块名 -> {"time", "dist", "usage", "source"}
+        self.importers = {}      # 模块名 -> 由谁引入（广度优先的第一个导入者）
+        self.pulled_by = {}      # 模块名 -> 引入它的顶层导入（项目直接导入的模块）
+        self.users = {}          # 模块名 -> 导入它的模块列表（module_usage 的反向边）
+        self.candidates = []     # [(--nofollow-import-to 的值, 类型, 原因, 可节省的优化时间, 模块数)]
+
+    @property
+    def total_time(self):
+        return sum(m["time"] for m in self.modules.values())
+
+    def outside_importer(self, value):
+        """value 及其子模块被 value 之外的哪个模块导入（返回第一个），没有时返回 None"""
+        prefix = value + "."
+        for used, users in self.users.items():
+            if used == value or used.startswith(prefix):
+                for user in users:
+                    if user != value and not user.startswith(prefix):
+                        return user
+        return None
+
+    def top_modules(self, limit=10):
+        """按优化耗时排序的模块"""
+        return sorted(self.modules.items(), key=lambda kv: kv[1]["time"], reverse=True)[:limit]
+
+    def top_distributions(self, limit=10):
+        """按优化耗时排序的发行包：[(名称, 耗时, 模块数)]"""
+        stats = {}
+        for info in self.modules.values():
+            entry = stats.setdefault(info["dist"], [0.0, 0])
+            entry[0] += info["time"]
+            entry[1] += 1
+        return sorted(((k, t, n) for k, (t, n) in stats.items()), key=lambda x: (x[1], x[2]), reverse=True)[:limit]
+
+
+class NuitkaReportAnalyzer:
+    """流式分析 Nuitka --report 生成的 XML（iterparse 逐个模块处理，内存占用与报告大小无关）。
+
+    统计每个模块和发行包的优化耗时与被跟踪的模块数，沿 module_usage 边从 __main__ 广度优先
+    找出每个模块是被项目的哪个顶层导入拉进来的，并给出下次构建可用的 --nofollow-import-to 候选。
+    """
+    # 视为测试代码的模块名片段
+    TEST_PARTS = ("test", "tests", "testing", "conftest")
+    # 只被包内注册表按需加载的插件模块：包名 -> (模块名正则, 从项目源码中判断格式是否被使用的别名)
+    LAZY_PLUGIN_FAMILIES = {
+        "PIL": (r"^PIL\.(\w+)ImagePlugin$", {"jpeg": ("jpg", "jpeg"), "tiff": ("tif", "tiff")}),
+    }
+    MIN_CANDIDATE_TIME = 1.0  # 传递依赖的总耗时低于该值（秒）时不建议排除
+
+    def analyze(self, path, model=None):
+        """分析报告文件；model 为项目依赖模型，用于判断哪些导入来自项目本身"""
+        import xml.etree.ElementTree as ET
+        report = NuitkaReport(path)
+        edges = {}
+        current = None
+        root = None
+        # Nuitka 声明的编码为 "utf8"，expat 不认识这个别名，显式指定
+        parser = ET.XMLParser(encoding="utf-8")
+        for event, elem in ET.iterparse(path, events=("start", "end"), parser=parser):
+            tag = elem.tag
+            if event == "start":
+                if root is None:
+                    root = elem
+                    report.nuitka_version = elem.get("nuitka_version", "")
+                    report.completion = elem.get("completion", "")
+                elif tag == "module":
+                    source = elem.get("source_path", "")
+                    dist = (elem.get("distribution") or "").split(",")[0]
+                    if not dist:
+                        dist = "(标准库)" if source.startswith("${sys.real_prefix}") else "(项目)"
+                    current = elem.get("name")
+                    report.modules[current] = {"time": 0.0, "dist": dist, "usage": elem.get("usage", ""), "source": source}
+                    edges[current] = []
+                continue
+            if current is None:
+                continue
+            if tag == "optimization-time":
+                try:
+                    report.modules[current]["time"] += float(elem.get("time", 0))
+                except ValueError:
+                    pass
+            elif tag == "module_usage":
+                if elem.get("finding") in ("absolute", "relative", "built-in"):
+                    edges[current].append(elem.get("name"))
+            elif tag == "module":
+                current = None
+                # 处理完一个模块即释放其子树
+                elem.clear()
+                root.clear()
+
+        for name, used_names in edges.items():
+            for used in used_names:
+                report.users.setdefault(used, []).append(name)
+        self._attribute(report, edges, model)
+        report.candidates = self._candidates(report, model)
+        return report
+
+    @staticmethod
+    def _is_project(name, model):
+        return name == "__main__" or bool(model and name.split(".")[0] in model.local_modules)
+
+    def _attribute(self, report, edges, model):
+        """从 __main__ 广度优先遍历导入边，记录每个模块的第一个导入者及所属的顶层导入"""
+        from collections import deque
+        modules = report.modules
+        if "__main__" not in modules:
+            return
+        queue = deque(["__main__"])
+        seen = {"__main__"}
+        while queue:
+            name = queue.popleft()
+            from_project = self._is_project(name, model)
+            for used in edges.get(name, ()):
+                # 导入子模块时父包也会被导入
+                parts = used.split(".")
+                for i in range(1, len(parts) + 1):
+                    dep = ".".join(parts[:i])
+                    if dep in seen or dep not in modules:
+                        continue
+                    seen.add(dep)
+                    report.importers[dep] = name
+                    report.pulled_by[dep] = dep if from_project else report.pulled_by.get(name, name)
+                    queue.append(dep)
+
+    @staticmethod
+    def _project_text(model):
+        """项目源码的小写文本（用于判断插件格式是否被使用）"""
+        chunks = []
+        for path in (model.files if model else ()):
+            try:
+                with open(path, "r", encoding="utf-8", errors="ignore") as f:
+                    chunks.append(f.read().lower())
+            except OSError:
+                pass
+        return "\n".join(chunks)
+
+    def _candidates(self, report, model):
+        import re
+        modules = report.modules
+        direct = set(model.external_imports) if model else set()
+        direct_roots = set(model.external_roots) if model else set()
+        candidates = []
+        covered = set()
+
+        def add(value, kind, reason):
+            names = [n for n in modules if n == value or n.startswith(value + ".")]
+            if not names or value in covered:
+                return
+            covered.add(value)
+            candidates.append((value, kind, reason, sum(modules[n]["time"] for n in names), len(names)))
+
+        # 1. 第三方包中的测试代码
+        for name in sorted(modules):
+            if modules[name]["dist"] in ("(项目)", "(标准库)"):
+                continue
+            parts = name.split(".")
+            for i, part in enumerate(parts[1:], 1):
+                if part in self.TEST_PARTS or part.startswith("test_"):
+                    add(".".join(parts[:i + 1]), "tests", "测试代码")
+                    break
+
+        # 2. 只由包内注册表加载、项目未使用其格式的插件模块
+        text = None
+        for package, (pattern, aliases) in self.LAZY_PLUGIN_FAMILIES.items():
+            regex = re.compile(pattern)
+            for name in sorted(modules):
+                m = regex.match(name)
+                if not m or name in direct:
+                    continue
+                if text is None:
+                    text = self._project_text(model)
+                fmt = m.group(1).lower()
+                if any(alias in text for alias in aliases.get(fmt, (fmt,))):
+                    continue
+                add(name, "plugin", f"{package} 插件，项目源码中未出现 {fmt} 格式")
+
+        # 3. 项目没有直接导入、只经由其他第三方包传递引入的顶层包
+        roots = {}
+        for name, info in modules.items():
+            root_name = name.split(".")[0]
+            if info["dist"] in ("(项目)", "(标准库)") or root_name in direct_roots:
+                continue
+            pulled = report.pulled_by.get(name)
+            if pulled and pulled.split(".")[0] != root_name:
+                roots.setdefault(root_name, set()).add(pulled.split(".")[0])
+        for root_name, via in sorted(roots.items()):
+            cost = sum(i["time"] for n, i in modules.items() if n.split(".")[0] == root_name)
+            if cost >= self.MIN_CANDIDATE_TIME:
+                add(root_name, "transitive", f"项目未直接导入，由 {', '.join(sorted(via))} 间接引入（排除前请确认不影响功能）")
+
+        candidates.sort(key=lambda c: c[3], reverse=True)
+        return candidates
+
+    @staticmethod
+    def format_summary(report, limit=10):
+        """生成写入日志的摘要文本"""
+        lines = [f"编译报告分析: {len(report.modules)} 个模块，优化总耗时 {report.total_time:.1f} 秒"]
+        lines.append("耗时最多的发行包:")
+        for dist, cost, count in report.top_distributions(limit):
+            lines.append(f"  {dist:<24} {cost:7.1f} 秒  {count:5d} 个模块")
+        lines.append("耗时最多的模块:")
+        for name, info in report.top_modules(limit):
+            via = report.pulled_by.get(name)
+            suffix = f"（由 {via} 引入）" if via and via != name else ""
+            lines.append(f"  {name:<40} {info['time']:6.2f} 秒{suffix}")
+        if report.candidates:
+            lines.append("建议下次构建排除（--nofollow-import-to）:")
+            shown = report.candidates[:limit * 2]
+            for value, _, reason, cost, count in shown:
+                lines.append(f"  {value:<40} {cost:6.1f} 秒  {count:4d} 个模块  {reason}")
+            rest = report.candidates[len(shown):]
+            if rest:
+                lines.append(f"  …… 另有 {len(rest)} 项，合计 {sum(c[3] for c in rest):.1f} 秒")
+        return "\n".join(lines) + "\n"
+
+
+REPORT_ANALYZER = NuitkaReportAnalyzer()
+
+# ===========================
+# 项目排除配置
+# ===========================
+class ExclusionProfile:
+    """保存在项目目录中的 --nofollow-import-to 排除配置。
+
+    编译报告中确定运行时用不到的部分（没有被包外模块导入的第三方测试代码）自动学习；其余建议需要用户接受，
+    拒绝过的建议不再提示。每项记录最近一次被编译时涉及的模块数和优化耗时，供排除预览使用。
+    """
+    FILE_NAME = ".packer-profile.json"
+    VERSION = 1
+    AUTO_KINDS = ("tests",)  # 无需确认即自动加入配置的建议类型
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}      # 排除项 -> {"source": "learned"/"accepted", "reason", "modules", "time"}
+        self.suggestions = {}  # 待用户确认的建议，格式同上（source 为 "suggested"）
+        self.rejected = set()  # 用户拒绝过的建议
+
+    @classmethod
+    def load(cls, target):
+        """读取入口脚本所在目录中的配置，不存在或损坏时返回空配置"""
+        import json
+        profile = cls(os.path.join(os.path.dirname(os.path.abspath(target)), cls.FILE_NAME))
+        try:
+            with open(profile.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == cls.VERSION:
+                profile.entries = data.get("exclusions", {})
+                profile.suggestions = data.get("suggestions", {})
+                profile.rejected = set(data.get("rejected", []))
+        except (OSError, ValueError):
+            pass
+        return profile
+
+    def save(self):
+        import json
+        data = {
+            "version": self.VERSION,
+            "exclusions": self.entries,
+            "suggestions": self.suggestions,
+            "rejected": sorted(self.rejected),
+        }
+        tmp = self.path + ".tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=2, sort_keys=True)
+            os.replace(tmp, self.path)
+        except OSError:
+            pass
+
+    def exclusions(self, model=None):
+        """要加入构建命令的排除项（跳过项目直接导入的模块及其父包）"""
+        direct = model.external_imports if model else ()
+        return [name for name in sorted(self.entries)
+                if not any(imp == name or imp.startswith(name + ".") for imp in direct)]
+
+    def learn(self, report):
+        """根据编译报告更新配置，返回 (自动学习的排除项, 新增的待确认建议)"""
+        learned, suggested = [], []
+        for value, kind, reason, cost, count in report.candidates:
+            stats = {"reason": reason, "modules": count, "time": round(cost, 2)}
+            # 被包内其他模块导入的测试代码（如包的 __init__ 引用了 testing）不能确定运行时用不到
+            importer = report.outside_importer(value) if kind in self.AUTO_KINDS else None
+            if value in self.entries:
+                # 仍被编译（例如项目后来直接导入了它），刷新统计
+                self.entries[value].update(stats)
+            elif kind in self.AUTO_KINDS and importer is None:
+                self.entries[value] = dict(stats, source="learned")
+                learned.append(value)
+            elif value not in self.rejected:
+                if importer:
+                    stats["reason"] = f"{reason}，但被 {importer} 导入（排除前请确认不影响功能）"
+                if value not in self.suggestions:
+                    suggested.append(value)
+                self.suggestions[value] = dict(stats, source="suggested")
+        return learned, suggested
+
+    def apply(self, kept, accepted):
+        """应用用户在排除预览中的选择：kept 为保留的排除项，accepted 为接受的建议"""
+        for name in list(self.entries):
+            if name not in kept:
+                del self.entries[name]
+                self.rejected.add(name)
+        for name, info in list(self.suggestions.items()):
+            if name in accepted:
+                self.entries[name] = dict(info, source="accepted")
+            else:
+                self.rejected.add(name)
+            del self.suggestions[name]
+
+# ===========================
+# 构建结果缓存
+# ===========================
+class BuildResultCache:
+    """按内容寻址的整次构建结果缓存。
+
+    构建指纹覆盖：项目源文件内容、目标解释器身份、已安装发行包及版本（含打包工具版本）、
+    以及 get_cmd 生成的全部参数（取增量改写前的 tool.base_cmd，去掉并行数和输出路径等不影响结果的部分，图标按内容哈希）。
+    指纹相同即直接把缓存的产物恢复到输出目录，跳过整个打包流程。
+    """
+    MAX_ENTRIES = 5  # 最多保留的构建结果数（按最近使用淘汰）
+    # 带值的路径参数（参数本身和紧随的值都不参与指纹）
+    PATH_OPTIONS = ("--distpath", "--specpath", "--workpath")
+    IGNORED_PREFIXES = ("--jobs=", "--output-dir=", "--report=")
+
+    @staticmethod
+    def _file_digest(path):
+        import hashlib
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        return h.hexdigest()
+
+    def fingerprint(self, tool, target, icon, env_mgr):
+        """计算构建指纹，无法确定输入时返回 None。
+
+        使用 tool.base_cmd 而不是实际执行的命令：PyInstaller 复用 spec 时 --icon、-w 等参数只在 spec 中，
+        改写后的命令既不包含图标，首次构建与后续构建的指纹也会不同。
+        """
+        import hashlib, json
+        model = PROJECT_ANALYZER.analyze(target)
+        if model.errors:
+            return None
+        info = env_mgr.get_interpreter_info()
+        installed = env_mgr.get_installed_distributions()
+        if info is None or installed is None:
+            return None
+        sources = {os.path.relpath(p, model.root): self._file_digest(p) for p in model.files}
+        target_abs = os.path.abspath(target)
+        options = []
+        skip_next = False
+        for arg in (tool.base_cmd or [])[1:]:
+            if skip_next:
+                skip_next = False
+                continue
+            if arg in self.PATH_OPTIONS:
+                skip_next = True
+                continue
+            if arg.startswith(self.IGNORED_PREFIXES) or arg in (target, target_abs):
+                continue
+            if icon and arg.endswith(icon):
+                arg = arg[:-len(icon)] + "icon:" + self._file_digest(icon)
+            options.append(arg)
+        payload = {
+            "tool": tool.name,
+            "sources": sources,
+            "interpreter": [info["version"], _path_mtime(env_mgr.python_path)],
+            "distributions": installed,
+            "options": options,
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def _entry_dir(self, fingerprint):
+        return os.path.join(get_cache_dir("artifacts"), fingerprint)
+
+    def restore(self, fingerprint, out, log):
+        """命中时把缓存的产物恢复到输出目录，返回是否命中"""
+        import json
+        entry = self._entry_dir(fingerprint)
+        try:
+            with open(os.path.join(entry, "manifest.json"), "r", encoding="utf-8") as f:
+                names = json.load(f)["items"]
+        except Exception:
+            return False
+        start = time.time()
+        os.makedirs(out, exist_ok=True)
+        for name in names:
+            src, dst = os.path.join(entry, name), os.path.join(out, name)
+            if os.path.isdir(dst):
+                shutil.rmtree(dst)
+            if os.path.isdir(src):
+                shutil.copytree(src, dst)
+            else:
+                shutil.copy2(src, dst)
+        os.utime(entry)  # 更新最近使用时间
+        log(f"命中构建缓存 {fingerprint[:12]}，已恢复 {', '.join(names)} 到 {out}（用时 {time.time() - start:.1f} 秒）\n")
+        return True
+
+    def store(self, fingerprint, out, names, log):
+        """把本次构建的产物存入缓存"""
+        import json
+        names = [n for n in names if os.path.exists(os.path.join(out, n))]
+        if not names:
+            return
+        entry = self._entry_dir(fingerprint)
+        tmp = entry + ".tmp"
+        try:
+            shutil.rmtree(tmp, ignore_errors=True)
+            os.makedirs(tmp)
+            for name in names:
+                src = os.path.join(out, name)
+                if os.path.isdir(src):
+                    shutil.copytree(src, os.path.join(tmp, name))
+                else:
+                    shutil.copy2(src, os.path.join(tmp, name))
+            with open(os.path.join(tmp, "manifest.json"), "w", encoding="utf-8") as f:
+                json.dump({"items": names, "created": time.time()}, f)
+            shutil.rmtree(entry, ignore_errors=True)
+            os.replace(tmp, entry)
+            log(f"构建结果已缓存: {fingerprint[:12]}\n")
+        except Exception as e:
+            shutil.rmtree(tmp, ignore_errors=True)
+            log(f"缓存构建结果失败: {e}\n")
+            return
+        self._evict()
+
+    def _evict(self):
+        root = get_cache_dir("artifacts")
+        entries = [e for e in os.scandir(root) if e.is_dir() and not e.name.endswith(".tmp")]
+        entries.sort(key=lambda e: e.stat().st_mtime, reverse=True)
+        for e in entries[self.MAX_ENTRIES:]:
+            shutil.rmtree(e.path, ignore_errors=True)
+
+
+BUILD_CACHE = BuildResultCache()
+
+# ===========================
+# 构建历史
+# ===========================
+class BuildHistory:
+    """本地构建历史（SQLite），按项目（入口脚本）和配置（打包参数）记录每次构建各阶段的耗时、模块数和产物大小。
+
+    最近几次成功构建的中位数用于预计总耗时、按本项目的实际耗时校准进度条的阶段区间，
+    以及在某次构建明显慢于中位数时提示性能回退。总耗时从开始打包算起，不含依赖检查。
+    """
+    DB_NAME = "build_history.sqlite3"
+    RECENT = 10                  # 参与统计的最近成功构建数
+    MIN_SAMPLES = 2              # 成功构建少于该次数时不做估算
+    KEEP = 50                    # 每个项目/配置保留的记录数
+    REGRESSION_RATIO = 1.5       # 超过中位数的该倍数视为回退
+    REGRESSION_MIN_SECONDS = 10  # 比中位数多出的时间小于该秒数时不提示（短构建的正常波动）
+    # 不是由进度解析器划分的阶段：依赖检查不计入总耗时，项目分析和收尾不属于打包工具的输出阶段，不参与阶段回退排名
+    NON_STAGE_PHASES = ("dep_check", "prepare", "cleanup")
+    # 不区分配置的参数：输出路径类（并行数影响耗时，保留）
+    PATH_OPTIONS = BuildResultCache.PATH_OPTIONS
+    IGNORED_PREFIXES = ("--output-dir=", "--report=")
+    PHASE_LABELS = {
+        "dep_check": "依赖检查", "prepare": "项目分析",
+        "analyzing": "分析", "module_analysis": "模块分析", "creating": "生成 C 代码",
+        "compiling": "C 编译", "linking": "链接", "processing": "处理资源", "building": "构建",
+        "finishing": "压缩", "cleanup": "收尾",
+    }
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ready = False
+
+    def _connect(self):
+        import sqlite3
+        conn = sqlite3.connect(os.path.join(get_cache_dir(), self.DB_NAME), timeout=5)
+        if not self._ready:
+            conn.executescript(
+                "CREATE TABLE IF NOT EXISTS builds ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT, project TEXT NOT NULL, config TEXT NOT NULL,"
+                " tool TEXT NOT NULL, started REAL NOT NULL, total REAL NOT NULL, success INTEGER NOT NULL,"
+                " modules INTEGER, output_size INTEGER);"
+                "CREATE INDEX IF NOT EXISTS builds_key ON builds (project, config, id);"
+                "CREATE TABLE IF NOT EXISTS phases ("
+                " build_id INTEGER NOT NULL, phase TEXT NOT NULL, seconds REAL NOT NULL,"
+                " PRIMARY KEY (build_id, phase));"
+            )
+            self._ready = True
+        return conn
+
+    def key(self, tool, target):
+        """(项目, 配置)：项目为入口脚本的绝对路径，配置为工具、增量模式和打包参数的哈希"""
+        import hashlib
+        target_abs = os.path.abspath(target)
+        options = [tool.name, "incremental" if getattr(tool, "incremental", False) else "full"]
+        skip_next = False
+        for arg in (tool.base_cmd or [])[1:]:
+            if skip_next:
+                skip_next = False
+            elif arg in self.PATH_OPTIONS:
+                skip_next = True
+            elif not arg.startswith(self.IGNORED_PREFIXES) and arg not in (target, target_abs, "--remove-output"):
+                options.append(arg)
+        return os.path.normcase(target_abs), hashlib.sha1("\0".join(options).encode("utf-8")).hexdigest()[:16]
+
+    @staticmethod
+    def output_size(out, names):
+        """产物（文件或目录）的总字节数"""
+        total = 0
+        for name in names:
+            path = os.path.join(out, name)
+            if os.path.isfile(path):
+                total += os.path.getsize(path)
+            for root, _, files in os.walk(path):
+                for f in files:
+                    try:
+                        total += os.path.getsize(os.path.join(root, f))
+                    except OSError:
+                        pass
+        return total
+
+    def record(self, key, tool_name, total, phases, success, modules=None, output_size=None):
+        """写入一次构建记录并淘汰该项目/配置下较旧的记录，失败时返回 False"""
+        try:
+            with self._lock:
+                conn = self._connect()
+                try:
+                    with conn:
+                        cur = conn.execute(
+                            "INSERT INTO builds (project, config, tool, started, total, success, modules, output_size)"
+                            " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                            (*key, tool_name, time.time() - total, total, int(bool(success)), modules, output_size))
+                        conn.executemany("INSERT INTO phases (build_id, phase, seconds) VALUES (?, ?, ?)",
+                                         [(cur.lastrowid, phase, seconds) for phase, seconds in phases.items()])
+                        stale = [row[0] for row in conn.execute(
+                            "SELECT id FROM builds WHERE project = ? AND config = ? ORDER BY id DESC LIMIT -1 OFFSET ?",
+                            (*key, self.KEEP))]
+                        if stale:
+                            marks = ",".join("?" * len(stale))
+                            conn.execute(f"DELETE FROM phases WHERE build_id IN ({marks})", stale)
+                            conn.execute(f"DELETE FROM builds WHERE id IN ({marks})", stale)
+                finally:
+                    conn.close()
+            return True
+        except Exception:
+            return False
+
+    def estimate(self, key):
+        """最近成功构建的中位数：{"samples", "total", "phases", "modules", "output_size"}，样本不足时返回 None"""
+        from statistics import median
+        try:
+            with self._lock:
+                conn = self._connect()
+                try:
+                    builds = conn.execute(
+                        "SELECT id, total, modules, output_size FROM builds"
+                        " WHERE project = ? AND config = ? AND success = 1 ORDER BY id DESC LIMIT ?",
+                        (*key, self.RECENT)).fetchall()
+                    if len(builds) < self.MIN_SAMPLES:
+                        return None
+                    marks = ",".join("?" * len(builds))
+                    rows = conn.execute(f"SELECT phase, seconds FROM phases WHERE build_id IN ({marks})",
+                                        [b[0] for b in builds]).fetchall()
+                finally:
+                    conn.close()
+        except Exception:
+            return None
+        phases = {}
+        for phase, seconds in rows:
+            phases.setdefault(phase, []).append(seconds)
+        modules = [b[2] for b in builds if b[2] is not None]
+        sizes = [b[3] for b in builds if b[3] is not None]
+        return {
+            "samples": len(builds),
+            "total": median(b[1] for b in builds),
+            "phases": {phase: median(values) for phase, values in phases.items()},
+            "modules": median(modules) if modules else None,
+            "output_size": median(sizes) if sizes else None,
+        }
+
+    def regressions(self, estimate, total, phases):
+        """与历史中位数比较，明显变慢时返回提示行（含变慢最多的阶段），否则返回空列表"""
+        slower = total - estimate["total"]
+        if total < estimate["total"] * self.REGRESSION_RATIO or slower < self.REGRESSION_MIN_SECONDS:
+            return []
+        lines = [f"⚠ 构建耗时 {_format_duration(total)}，比最近 {estimate['samples']} 次成功构建的中位数 "
+                 f"{_format_duration(estimate['total'])} 慢 {slower / estimate['total']:.0%}\n"]
+        deltas = sorted(((seconds - estimate["phases"].get(phase, 0), phase, seconds) for phase, seconds in phases.items()
+                         if phase not in self.NON_STAGE_PHASES), reverse=True)
+        for delta, phase, seconds in deltas[:3]:
+            if delta < 1:
+                break
+            lines.append(f"  {self.PHASE_LABELS.get(phase, phase)}: {_format_duration(seconds)}"
+                         f"（中位数 {_format_duration(estimate['phases'].get(phase, 0))}）\n")
+        return lines
+
+
+def _format_duration(seconds):
+    """秒数格式化为 mm:ss"""
+    seconds = int(round(seconds))
+    return f"{seconds // 60:02d}:{seconds % 60:02d}"
+
+
+BUILD_HISTORY = BuildHistory()
+
+class OutputReader:
+    """子进程输出读取器：按大块读取原始字节并增量解码，按 \\n 和 \\r 切分成行。
+
+    POSIX 上用 selectors 等待管道可读；Windows 的匿名管道不支持 select，由后台线程阻塞读取并经队列转交。
+    两种方式都带等待超时：超时时 lines() 产出 None，调用方据此检查取消和总超时，无需忙等。
+    """
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, stream, encoding="utf-8"):
+        import codecs
+        self._fd = stream.fileno()
+        self._decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+        if sys.platform == "win32":
+            import queue
+            self._queue = queue.Queue()
+            threading.Thread(target=self._pump, daemon=True).start()
+        else:
+            import selectors
+            self._selector = selectors.DefaultSelector()
+            self._selector.register(self._fd, selectors.EVENT_READ)
+
+    def _pump(self):
+        """Windows：后台线程阻塞读取，读到 EOF（空字节串）后结束"""
+        while True:
+            try:
+                data = os.read(self._fd, self.CHUNK_SIZE)
+            except OSError:
+                data = b""
+            self._queue.put(data)
+            if not data:
+                return
+
+    def _read_chunk(self, timeout):
+        """读取一块输出：EOF 返回 b""，超时返回 None"""
+        if sys.platform == "win32":
+            import queue
+            try:
+                return self._queue.get(timeout=timeout)
+            except queue.Empty:
+                return None
+        if not self._selector.select(timeout):
+            return None
+        try:
+            return os.read(self._fd, self.CHUNK_SIZE)
+        except OSError:
+            return b""
+
+    def lines(self, poll=0.5):
+        """逐行产出输出（统一以 \\n 结尾）；poll 秒内没有新输出时产出 None"""
+        import re
+        line_break = re.compile(r"\r\n|\r|\n")
+        pending = ""
+        while True:
+            chunk = self._read_chunk(poll)
+            if chunk is None:
+                yield None
+                continue
+            eof = not chunk
+            pending += self._decoder.decode(chunk, final=eof)
+            # 末尾的 \r 可能是被截断的 \r\n，留到下一块再切分
+            hold = ""
+            if not eof and pending.endswith("\r"):
+                pending, hold = pending[:-1], "\r"
+            pieces = line_break.split(pending)
+            pending = pieces.pop() + hold
+            for piece in pieces:
+                # 连续的 \r（刷新进度）会切出空行，直接跳过
+                if piece:
+                    yield piece + "\n"
+            if eof:
+                if pending:
+                    yield pending + "\n"
+                if sys.platform != "win32":
+                    self._selector.close()
+                return
+
+
+class LogBuffer:
+    """线程安全的日志缓冲：任意线程写入，UI 线程定时批量取出并一次性插入日志视图。
+
+    打包期间的完整日志同时写入磁盘文件，日志视图只保留最近的若干行。
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = []
+        self._file = None
+        self.path = None
+
+    def open_file(self, path):
+        """开始把日志写入文件（覆盖同名旧日志）"""
+        self.close_file()
+        try:
+            f = open(path, "w", encoding="utf-8", errors="replace")
+        except OSError:
+            return False
+        with self._lock:
+            self._file, self.path = f, path
+        return True
+
+    def close_file(self):
+        with self._lock:
+            f, self._file = self._file, None
+        if f:
+            f.close()
+
+    def write(self, text):
+        if not text.endswith("\n"):
+            text += "\n"
+        with self._lock:
+            self._pending.append(text)
+            if self._file:
+                self._file.write(text)
+
+    def drain(self):
+        """取出自上次以来写入的全部文本"""
+        with self._lock:
+            pending, self._pending = self._pending, []
+        return "".join(pending)
+
+
 class WorkerSignals(QObject):
     log = pyqtSignal(str)
     finished = pyqtSignal(bool)
@@ -920,7 +3374,12 @@ class WorkerSignals(QObject):
 
 
 class ProgressParser:
-    """解析打包输出并估算进度百分比"""
+    """解析打包输出并估算进度百分比。
+
+    每行转一次小写并只切分出前几个词，得到行标签（如 Nuitka-Scons）和消息首词，
+    再查预先建立的分派表得到少量候选规则，只对候选规则检查其余关键字。大部分行在一次切分和两次字典查找后即返回；
+    只有命中百分比规则的行才运行（预编译的）百分比正则。进度单调不减。
+    """
     
     # Nuitka 阶段权重（总和100）
     NUITKA_STAGES = {
@@ -940,140 +3399,382 @@ class ProgressParser:
         'finishing': (90, 100),    # 完成 90-100%
     }
     
-    def __init__(self, tool_name='nuitka'):
+    # 行标签在行内第几个词：Nuitka 为 "Nuitka-Scons: Backend ..."，PyInstaller 为 "4540 INFO: Analyzing ..."。
+    # 标签词以冒号结尾，取第一个冒号之前的部分（Nuitka-Scons:WARNING: -> nuitka-scons），紧随其后的词为消息首词。
+    TAG_POSITIONS = {'nuitka': 0, 'pyinstaller': 1}
+    
+    # 规则表：(分派键, 关键字条件, 阶段, 动作, 参数)，同一行的候选规则按表中顺序检查，只应用第一条满足条件的规则。
+    # 分派键是行标签或消息首词（小写），"" 表示没有标签的行（编译器命令行等）。
+    # 关键字条件是若干组关键字（小写），每组至少出现一个才算满足。动作：
+    #   enter:   进入阶段，进度为阶段起点 + 参数
+    #   end:     阶段结束，进度为阶段终点
+    #   count:   阶段内每匹配一行增加参数，不超过阶段终点
+    #   percent: 把行内的百分比映射到阶段区间
+    #   done:    100%
+    NUITKA_RULES = (
+        ("successfully", (("created",),), None, 'done', 0),
+        ("nuitka-onefile", (), 'finishing', 'enter', 0),
+        ("onefile", (), 'finishing', 'enter', 0),  # Nuitka-Scons: Onefile C compiler/linking
+        ("removing", (), 'finishing', 'enter', 0),
+        ("keeping", (), 'finishing', 'enter', 0),
+        ("scons", (("%",),), 'compiling', 'percent', 0),
+        ("nuitka-scons", (("%",),), 'compiling', 'percent', 0),
+        ("backend", (("linking",),), 'linking', 'enter', 0),
+        ("backend", (("compiler",),), 'compiling', 'enter', 0),
+        ("", (("link.exe",),), 'linking', 'enter', 0),
+        ("", ((".c",), ("gcc", "clang", "cl.exe", "msvc")), 'compiling', 'count', 0.5),
+        ("running", (("c compilation",),), 'compiling', 'enter', 0),
+        ("running", (("data composer",),), 'creating', 'enter', 10),
+        ("generating", (), 'creating', 'enter', 5),
+        ("included", (), 'creating', 'count', 0.05),
+        ("completed", (("python level compilation",),), 'creating', 'enter', 0),
+        ("nuitka-plugins", (), 'module_analysis', 'count', 0.5),
+        ("starting", (("python compilation",),), 'analyzing', 'enter', 0),
+    )
+    PYINSTALLER_RULES = (
+        ("build", (("complete",),), None, 'done', 0),
+        ("building", (("analysis",),), 'analyzing', 'enter', 0),
+        ("building", (("exe",),), 'finishing', 'enter', 0),
+        ("building", (("pkg", "collect"),), 'building', 'enter', 5),
+        ("building", (), 'building', 'enter', 0),
+        ("running", (("analysis",),), 'analyzing', 'enter', 2),
+        ("analyzing", (("base_library",),), 'analyzing', 'enter', 5),
+        ("analyzing", (("run-time hooks",),), 'analyzing', 'enter', 25),
+        ("analyzing", (), 'analyzing', 'enter', 15),
+        ("processing", (), 'analyzing', 'count', 0.5),
+        ("creating", (("base_library",),), 'processing', 'enter', 0),
+        ("looking", (("dynamic libraries",),), 'processing', 'enter', 10),
+        ("graph", (("cross-reference",),), 'processing', 'end', 0),
+        ("copying", (), 'finishing', 'enter', 2),
+        ("appending", (), 'finishing', 'enter', 5),
+    )
+    
+    # 基准测试用的典型输出行（摘自实际构建日志，没有提供日志文件时按比例重复生成）
+    SAMPLE_LOGS = {
+        'nuitka': (
+            "Nuitka-Options: Used command line options:",
+            "Nuitka-Options:   --standalone --onefile --output-dir=out --remove-output app.py",
+            "Nuitka: Starting Python compilation with:",
+            "Nuitka:   Version '4.3' on Python 3.12 (flavor 'PyEnv Python') commercial grade 'not installed'.",
+            "Nuitka-Plugins:anti-bloat: Not including '_json' automatically in order to avoid bloat, but this may cause: may slow down by using fallback implementation.",
+            "Nuitka: Completed Python level compilation and optimization.",
+            "Nuitka: Generating source code for C backend compiler.",
+            "Nuitka-Inclusion: Included compiled module '__main__'.",
+            "Nuitka-Inclusion: Included extension module '_bz2'.",
+            "Nuitka: Running data composer tool for optimal constant value handling.",
+            "Nuitka: Running C compilation via Scons.",
+            "Nuitka-Scons: Backend C compiler: gcc (gcc 12).",
+            "gcc -o module.__main__.o -c -std=c11 -fvisibility=hidden -fwrapv -pipe -O2 -D_NUITKA_STANDALONE_MODE module.__main__.c",
+            "Nuitka-Scons: Backend C linking with 7 files (no progress information available for this stage).",
+            "Nuitka-Scons:WARNING: You are not using ccache, re-compilation of identical code will be slower than necessary.",
+            "Nuitka-Onefile: Creating single file from dist folder, this may take a while.",
+            "Nuitka-Onefile: Onefile payload compression ratio (26.24%) size 19877646 to 5216641.",
+            "Nuitka: Removing build directory 'out/app.build'.",
+            "Nuitka: Successfully created 'out/app.bin'.",
+        ),
+        'pyinstaller': (
+            "142 INFO: PyInstaller: 6.22.3, contrib hooks: 2026.8",
+            "145 INFO: wrote /tmp/app/app.spec",
+            " '/root/.pyenv/versions/3.11.7/lib/python3.11/site-packages',",
+            "286 INFO: Building Analysis because Analysis-00.toc is non existent",
+            "293 INFO: Running Analysis Analysis-00.toc",
+            "316 INFO: Analyzing modules for base_library.zip ...",
+            "958 INFO: Processing standard module hook 'hook-heapq.py' from '/usr/lib/python3.11/site-packages/PyInstaller/hooks'",
+            "4540 INFO: Analyzing /tmp/app/app.py",
+            "4838 INFO: Analyzing run-time hooks ...",
+            "4847 INFO: Creating base_library.zip...",
+            "4867 INFO: Looking for dynamic libraries",
+            "5192 INFO: Graph cross-reference written to /tmp/app/build/app/xref-app.html",
+            "5207 INFO: Building PYZ (ZlibArchive) /tmp/app/build/app/PYZ-00.pyz",
+            "5359 INFO: Building PKG (CArchive) app.pkg",
+            "13105 INFO: Building PKG (CArchive) app.pkg completed successfully.",
+            "13107 INFO: Building EXE from EXE-00.toc",
+            "13108 INFO: Appending PKG archive to custom ELF section in EXE",
+            "13197 INFO: Build complete! The results are available in: /tmp/app/dist",
+        ),
+    }
+    
+    _compiled = {}  # 工具名 -> (规则表, 分派表)
+    _percent = None  # 百分比提取正则
+    
+    @classmethod
+    def _compile(cls, tool_name):
+        """编译规则表：关键字统一小写，建立 分派键 -> 候选规则序号 的分派表"""
+        if tool_name not in cls._compiled:
+            import re
+            rules = cls.NUITKA_RULES if tool_name == 'nuitka' else cls.PYINSTALLER_RULES
+            compiled = tuple(
+                (tuple(tuple(k.lower() for k in group) for group in groups), stage, action, arg)
+                for _, groups, stage, action, arg in rules
+            )
+            cls._compiled[tool_name] = (compiled, cls._dispatch_table(rules))
+            cls._percent = re.compile(r"(\d+)\s*%")
+        return cls._compiled[tool_name]
+    
+    @staticmethod
+    def _dispatch_table(rules, skip=()):
+        """分派键 -> 候选规则序号（按表中顺序），skip 中的规则序号不参与分派"""
+        dispatch = {}
+        for index, rule in enumerate(rules):
+            if index not in skip:
+                dispatch.setdefault(rule[0], []).append(index)
+        return {key: tuple(indexes) for key, indexes in dispatch.items()}
+    
+    def __init__(self, tool_name='nuitka', compile_watched=False):
+        """compile_watched: 编译阶段的进度由 CompileProgressWatcher 按构建目录给出时，不再按编译器命令行计数"""
         self.tool_name = tool_name.lower()
-        self.current_progress = 0
-        self.current_stage = None
-        self._compile_count = 0
-        self._total_modules = 0
+        self.stages = self.NUITKA_STAGES if self.tool_name == 'nuitka' else self.PYINSTALLER_STAGES
+        self._source, self._dispatch = self._compile(self.tool_name)
+        if compile_watched:
+            rules = self.NUITKA_RULES if self.tool_name == 'nuitka' else self.PYINSTALLER_RULES
+            skip = {i for i, rule in enumerate(rules) if rule[2] == 'compiling' and rule[3] == 'count'}
+            self._dispatch = self._dispatch_table(rules, skip)
+        self._rules = self._resolve(self._source, self.stages)
+        self._tag_pos = self.TAG_POSITIONS[self.tool_name]
+        self._memo = {}
+        self.reset()
+    
+    @staticmethod
+    def _resolve(rules, stages):
+        """按阶段区间把规则换算成 (关键字组, 阶段, 动作, 值, 步长, 上限)：
+        done/enter/end 直接给出目标进度（动作记为 None），count 与 percent 给出阶段起点、步长和上限"""
+        resolved = []
+        for groups, stage, action, arg in rules:
+            if action == 'done':
+                resolved.append((groups, stage, None, 100, 0, 100))
+                continue
+            start, end = stages[stage]
+            if action == 'enter':
+                resolved.append((groups, stage, None, int(start + arg), 0, end))
+            elif action == 'end':
+                resolved.append((groups, stage, None, end, 0, end))
+            elif action == 'count':
+                resolved.append((groups, stage, action, start, arg, end))
+            else:  # percent
+                resolved.append((groups, stage, action, start, (end - start) / 100, end))
+        return tuple(resolved)
+    
+    MEMO_LIMIT = 4096  # (标签词, 首词) -> 候选规则 的记忆上限
+    
+    def _lookup(self, key):
+        """按 (标签词, 首词) 查分派表，返回 (候选规则可达到的最高进度, 候选规则)，候选规则按表中顺序；结果记忆在 self._memo"""
+        dispatch = self._dispatch
+        if key and key[0][-1:] == ":":
+            found = dispatch.get(key[1].lower(), ()) + dispatch.get(key[0].lower().partition(":")[0], ())
+        else:
+            found = dispatch.get("", ())  # 没有标签的行
+        candidates = tuple(self._rules[index] for index in sorted(set(found)))
+        entry = (max((rule[5] for rule in candidates), default=-1), candidates)
+        if len(self._memo) >= self.MEMO_LIMIT:
+            self._memo.clear()
+        self._memo[key] = entry
+        return entry
     
     def reset(self):
         """重置进度"""
         self.current_progress = 0
         self.current_stage = None
-        self._compile_count = 0
-        self._total_modules = 0
+        self._counts = {}
+        self.timeline = []  # [(阶段, 进入时刻)]，用于统计各阶段耗时
+    
+    MIN_STAGE_SHARE = 0.03  # 校准时每个阶段至少占的耗时比例
+    
+    def calibrate(self, durations):
+        """按历史上各阶段的实际耗时（秒）重新划分阶段区间，使进度接近已用时间的比例。
+        
+        阶段顺序不变；规则中的阶段内偏移和步长按新旧区间宽度等比缩放。没有可用数据时保持默认权重。
+        每个阶段至少按总耗时的 MIN_STAGE_SHARE 计算：历史中没有检测到的阶段（耗时 0）不会缩成零宽度，
+        否则该阶段以后也无法被检测到，历史会一直强化这个结果。
+        """
+        order = list(self.stages)
+        total = sum(max(durations.get(stage, 0), 0) for stage in order)
+        if total <= 0:
+            return False
+        floor = total * self.MIN_STAGE_SHARE
+        seconds = {stage: max(durations.get(stage, 0), floor) for stage in order}
+        total = sum(seconds.values())
+        defaults, stages, start, elapsed = self.stages, {}, 0, 0.0
+        for stage in order:
+            elapsed += seconds[stage]
+            end = round(elapsed / total * 100)
+            stages[stage] = (start, end)
+            start = end
+        rules = []
+        for groups, stage, action, arg in self._source:
+            if stage and action in ('enter', 'count'):
+                old_start, old_end = defaults[stage]
+                new_start, new_end = stages[stage]
+                arg = arg * (new_end - new_start) / (old_end - old_start)
+            rules.append((groups, stage, action, arg))
+        self.stages, self._source = stages, tuple(rules)
+        self._rules = self._resolve(self._source, stages)
+        self._memo.clear()
+        return True
+    
+    def _enter(self, stage):
+        if stage != self.current_stage:
+            self.timeline.append((stage, time.monotonic()))
+            self.current_stage = stage
+    
+    def phase_times(self, start, end):
+        """各阶段耗时（秒）；进入第一个阶段之前的时间计入第一个阶段"""
+        times = {}
+        marks = self.timeline
+        for i, (stage, entered) in enumerate(marks):
+            begin = start if i == 0 else entered
+            finish = marks[i + 1][1] if i + 1 < len(marks) else end
+            times[stage] = times.get(stage, 0.0) + max(finish - begin, 0.0)
+        return times
     
     def parse_line(self, line: str) -> int:
         """解析一行输出并返回估算的进度百分比"""
+        pos = self._tag_pos
+        words = line.split(None, pos + 2)
+        key = (words[pos], words[pos + 1]) if len(words) > pos + 1 else ""
+        entry = self._memo.get(key)
+        if entry is None:
+            entry = self._lookup(key)
+        limit, candidates = entry
+        if limit < self.current_progress or not candidates:
+            return self.current_progress  # 没有候选规则，或候选规则都已不可能推进进度
         line_lower = line.lower()
-        
-        if self.tool_name == 'nuitka':
-            return self._parse_nuitka(line, line_lower)
-        else:
-            return self._parse_pyinstaller(line, line_lower)
-    
-    def _parse_nuitka(self, line: str, line_lower: str) -> int:
-        """解析 Nuitka 输出"""
-        stages = self.NUITKA_STAGES
-        
-        # 检测各个阶段
-        if 'nuitka-scons:info' in line_lower:
-            # 编译阶段的详细信息
-            if 'backend' in line_lower or 'c compiler' in line_lower:
-                self.current_stage = 'compiling'
-                self.current_progress = stages['compiling'][0]
-            elif 'linking' in line_lower:
-                self.current_stage = 'linking'
-                self.current_progress = stages['linking'][0]
-        
-        elif 'nuitka:info' in line_lower or 'nuitka: info' in line_lower:
-            if 'analysing' in line_lower or 'analyzing' in line_lower:
-                self.current_stage = 'analyzing'
-                self.current_progress = stages['analyzing'][0]
-            elif 'module' in line_lower and 'included' in line_lower:
-                self.current_stage = 'module_analysis'
-                # 根据模块数量估算进度
-                self._total_modules += 1
-                progress_in_stage = min(self._total_modules * 0.5, 15)
-                self.current_progress = int(stages['module_analysis'][0] + progress_in_stage)
-            elif 'creating' in line_lower or 'generating' in line_lower:
-                self.current_stage = 'creating'
-                self.current_progress = stages['creating'][0]
-        
-        # 编译进度检测 - 检测 .c 文件编译
-        if '.c' in line and ('compiling' in line_lower or 'gcc' in line_lower or 'cl.exe' in line_lower or 'msvc' in line_lower):
-            self.current_stage = 'compiling'
-            self._compile_count += 1
-            # 假设大约有100个文件需要编译，动态计算进度
-            compile_progress = min(self._compile_count * 0.5, 45)
-            self.current_progress = int(stages['compiling'][0] + compile_progress)
-        
-        # 检测编译百分比输出（如果有的话）
-        if 'scons:' in line_lower and '%' in line:
-            import re
-            match = re.search(r'(\d+)\s*%', line)
-            if match:
-                percent = int(match.group(1))
-                # 映射到编译阶段
-                compile_start, compile_end = stages['compiling']
-                compile_range = compile_end - compile_start
-                self.current_progress = int(compile_start + (percent / 100) * compile_range)
-        
-        # 链接检测
-        if 'linking' in line_lower or 'link.exe' in line_lower:
-            self.current_stage = 'linking'
-            self.current_progress = max(self.current_progress, stages['linking'][0])
-        
-        # 完成检测
-        if 'onefile' in line_lower and ('creating' in line_lower or 'building' in line_lower):
-            self.current_stage = 'finishing'
-            self.current_progress = stages['finishing'][0]
-        
-        if 'successfully' in line_lower or 'completed' in line_lower:
-            self.current_progress = 100
-        
-        return min(self.current_progress, 100)
-    
-    def _parse_pyinstaller(self, line: str, line_lower: str) -> int:
-        """解析 PyInstaller 输出"""
-        stages = self.PYINSTALLER_STAGES
-        
-        # 分析阶段
-        if 'analyzing' in line_lower or 'analysis' in line_lower:
-            self.current_stage = 'analyzing'
-            if 'complete' in line_lower:
-                self.current_progress = stages['analyzing'][1]
-            else:
-                self.current_progress = max(self.current_progress, stages['analyzing'][0] + 10)
-        
-        # 处理阶段
-        elif 'processing' in line_lower or 'copying' in line_lower:
-            self.current_stage = 'processing'
-            self.current_progress = max(self.current_progress, stages['processing'][0])
-            if 'binary' in line_lower or 'data' in line_lower:
-                self.current_progress = min(self.current_progress + 5, stages['processing'][1])
-        
-        # 构建阶段
-        elif 'building' in line_lower:
-            self.current_stage = 'building'
-            if 'exe' in line_lower:
-                self.current_progress = stages['building'][0] + 20
-            elif 'pyz' in line_lower:
-                self.current_progress = stages['building'][0] + 10
+        for groups, stage, action, progress, step, limit in candidates:
+            for group in groups:
+                for keyword in group:
+                    if keyword in line_lower:
+                        break
+                else:
+                    break
             else:
-                self.current_progress = max(self.current_progress, stages['building'][0])
-        
-        # 打包阶段
-        elif 'appending' in line_lower or 'upx' in line_lower:
-            self.current_progress = max(self.current_progress, 85)
-        
-        # 完成
-        elif 'successfully' in line_lower or 'completed' in line_lower:
-            self.current_progress = 100
-        
-        return min(self.current_progress, 100)
+                break
+        else:
+            return self.current_progress
+        if limit < self.current_progress:
+            return self.current_progress  # 该规则已不可能推进进度
+        if action is not None:
+            if action == 'count':
+                counts = self._counts
+                count = counts[stage] = counts.get(stage, 0) + 1
+                progress = min(int(progress + count * step), limit)
+            else:  # percent
+                match = self._percent.search(line)
+                if not match:
+                    return self.current_progress
+                progress = int(progress + min(int(match.group(1)), 100) * step)
+        if progress >= self.current_progress:
+            self.current_progress = progress
+            if stage is not None and stage != self.current_stage:
+                self._enter(stage)
+        return self.current_progress
+    
+    def feed_fraction(self, stage, fraction) -> int:
+        """把外部观测到的阶段完成比例（0~1）映射到该阶段区间，进度同样单调不减"""
+        start, end = self.stages[stage]
+        progress = int(start + max(0.0, min(fraction, 1.0)) * (end - start))
+        if progress >= self.current_progress:
+            self.current_progress = progress
+            self._enter(stage)
+        return self.current_progress
+    
+    @classmethod
+    def benchmark(cls, lines, tool_name='nuitka', repeat=3):
+        """测量解析吞吐量，返回 (每秒行数, 最终进度)；同时检查进度单调不减"""
+        best = None
+        for _ in range(repeat):
+            parser = cls(tool_name)
+            last = 0
+            start = time.perf_counter()
+            for line in lines:
+                progress = parser.parse_line(line)
+                if progress < last:
+                    raise AssertionError(f"进度倒退: {last} -> {progress}（{line.strip()}）")
+                last = progress
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return len(lines) / best if best else float("inf"), last
+    
+    @classmethod
+    def run_benchmark(cls, log_path=None, tool_name='nuitka', total=100000):
+        """命令行入口（python main.py --bench-progress [日志文件] [nuitka|pyinstaller]）：输出解析吞吐量"""
+        if log_path:
+            with open(log_path, "r", encoding="utf-8", errors="replace") as f:
+                lines = f.readlines()
+            source = log_path
+        else:
+            # 典型输出行按比例重复到 total 行，最后一行保持为结束行
+            sample = cls.SAMPLE_LOGS[tool_name]
+            body = sample[:-1]
+            lines = [body[i % len(body)] for i in range(total - 1)] + [sample[-1]]
+            source = f"内置样例 x{total}"
+        rate, final = cls.benchmark(lines, tool_name)
+        print(f"{tool_name} 进度解析: {len(lines)} 行（{source}），{rate:,.0f} 行/秒，"
+              f"{len(lines) / rate * 1000:.1f} 毫秒，最终进度 {final}%")
+        return rate
+
+
+class CompileProgressWatcher:
+    """观察 Nuitka 的 *.build 目录得到真实的 C 编译进度。
+
+    生成的 .c 文件数为总数，比对应 .c 新的 .o/.obj 数为已完成数（增量构建里未变化的模块
+    不会重新编译，但它们的目标文件本来就是最新的）。每次采样只对构建目录做一次 os.scandir，
+    不递归子目录。
+    """
+    
+    OBJECT_SUFFIXES = (".o", ".obj")
+    
+    def __init__(self, build_dir):
+        self.build_dir = build_dir
+    
+    def sample(self):
+        """返回 (已编译, 总数)；目录不存在或还没有生成 C 文件时返回 None"""
+        sources, objects = {}, []
+        try:
+            with os.scandir(self.build_dir) as entries:
+                for entry in entries:
+                    stem, ext = os.path.splitext(entry.name)
+                    if ext == ".c":
+                        sources[stem] = entry
+                    elif ext in self.OBJECT_SUFFIXES:
+                        objects.append((stem, entry))
+        except OSError:
+            return None
+        if not sources:
+            return None
+        done = 0
+        for stem, obj in objects:
+            source = sources.get(stem)
+            try:
+                if source is not None and obj.stat().st_mtime >= source.stat().st_mtime:
+                    done += 1
+            except OSError:
+                continue
+        return done, len(sources)
 
 
 class ToolRunner(QObject):
-    def __init__(self, cmd, env, tool_name='nuitka'):
+    WATCH_INTERVAL = 1.0  # 构建目录采样间隔（秒）
+    
+    def __init__(self, cmd, env, tool_name='nuitka', post_build=None, log=None, build_dir=None, stage_times=None):
         super().__init__()
         self.cmd = cmd
         self.env = env
+        # 编译阶段改用构建目录里的 .c/.o 数量计算进度，不再靠输出行数猜测
+        self._watcher = CompileProgressWatcher(build_dir) if build_dir else None
+        self.post_build = post_build  # 进程结束后的处理，签名 (success, log) -> success
+        # 输出行的去向：传入 LogBuffer.write 等可在工作线程直接调用的函数时不再逐行发送 Qt 信号
+        self.log = log or self.signals_log
         self.signals = WorkerSignals()
         self._process = None
         self._cancelled = False
-        self._progress_parser = ProgressParser(tool_name)
+        self._progress_parser = ProgressParser(tool_name, compile_watched=self._watcher is not None)
+        # 有构建历史时按本项目各阶段的实际耗时划分进度区间
+        if stage_times:
+            self._progress_parser.calibrate(stage_times)
+        self.stages = self._progress_parser.stages
+        self.phase_times = {}  # 进程结束后填入：阶段 -> 耗时（秒）
+    
+    def signals_log(self, text):
+        self.signals.log.emit(text)
     
     @property
     def is_running(self):
@@ -1112,37 +3813,53 @@ class ToolRunner(QObject):
                 startupinfo = subprocess.STARTUPINFO()
                 startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
             
+            # 以字节方式读取输出，由 OutputReader 按块读取并解码；子进程统一输出 UTF-8
+            env = dict(self.env if self.env is not None else os.environ, PYTHONIOENCODING="utf-8")
+            started = time.monotonic()
             self._process = subprocess.Popen(
                 self.cmd,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.STDOUT,
-                text=True,
-                bufsize=1,
-                universal_newlines=True,
                 startupinfo=startupinfo,
-                env=self.env
+                env=env
             )
             
-            # 逐行读取输出
-            for line in self._process.stdout:
+            # 逐行读取输出，进度只在数值变化时发送
+            last_progress = None
+            parser = self._progress_parser
+            next_sample = 0
+            for line in OutputReader(self._process.stdout).lines():
                 if self._cancelled:
                     break
-                self.signals.log.emit(line)
-                # 解析进度并发送信号
-                progress = self._progress_parser.parse_line(line)
-                self.signals.progress.emit(progress)
+                if line is not None:
+                    self.log(line)
+                    progress = parser.parse_line(line)
+                else:
+                    progress = parser.current_progress
+                if self._watcher and parser.current_stage == 'compiling' and time.monotonic() >= next_sample:
+                    next_sample = time.monotonic() + self.WATCH_INTERVAL
+                    sample = self._watcher.sample()
+                    if sample:
+                        progress = parser.feed_fraction('compiling', sample[0] / sample[1])
+                if progress != last_progress:
+                    last_progress = progress
+                    self.signals.progress.emit(progress)
             
             self._process.wait()
+            self.phase_times = parser.phase_times(started, time.monotonic())
             
             if self._cancelled:
                 self.signals.log.emit("打包已被用户取消\n")
                 self.signals.cancelled.emit()
             else:
-                self.signals.finished.emit(self._process.returncode == 0)
+                success = self._process.returncode == 0
+                if self.post_build:
+                    success = self.post_build(success, self.log)
+                self.signals.finished.emit(success)
                 
         except Exception as e:
             if not self._cancelled:
-                self.signals.log.emit(str(e))
+                self.log(str(e))
                 self.signals.finished.emit(False)
 
 
@@ -1174,6 +3891,12 @@ class DependencyCheckWorker(QObject):
         """执行依赖检查"""
         try:
             self.signals.log.emit("开始检测脚本依赖...\n")
+            start = time.time()
+            
+            # 优先按依赖声明文件（uv.lock 等）计算需要同步的差异
+            sync_specs = self.env_mgr.plan_sync(self.script_path, self.signals.log) or []
+            sync_names = {_canonical_name(_requirement_name(s)) for s in sync_specs}
+            
             self.signals.progress.emit("正在解析脚本...")
             
             # 解析依赖
@@ -1184,33 +3907,45 @@ class DependencyCheckWorker(QObject):
                 self.signals.finished.emit([])
                 return
             
-            if not dependencies:
+            if not dependencies and not sync_specs:
                 self.signals.log.emit("未检测到第三方依赖\n")
                 self.signals.finished.emit([])
                 return
             
-            self.signals.log.emit(f"检测到 {len(dependencies)} 个第三方依赖: {', '.join(dependencies)}\n")
+            if dependencies:
+                self.signals.log.emit(f"检测到 {len(dependencies)} 个第三方依赖: {', '.join(dependencies)}\n")
             
-            # 检查每个依赖是否已安装
-            missing_deps = []
-            total = len(dependencies)
-            for i, dep in enumerate(dependencies):
-                if self._is_cancelled:
-                    self.signals.log.emit("依赖检查已取消\n")
-                    self.signals.finished.emit([])
-                    return
-                
-                self.signals.progress.emit(f"检查依赖 ({i+1}/{total}): {dep}")
-                self.signals.log.emit(f"检查依赖: {dep}...")
-                
-                if not self.env_mgr.check_package_installed(dep, self.signals.log):
-                    missing_deps.append(dep)
-                    self.signals.log.emit(f" 未安装\n")
+            # 已在同步列表中的依赖不再单独检查，其余批量检查（未命中已安装列表的模块在一个子进程中统一解析）
+            synced = {dep for dep in dependencies
+                      if _canonical_name(self.env_mgr.get_pip_name(dep)) in sync_names}
+            to_check = [dep for dep in dependencies if dep not in synced]
+            self.signals.progress.emit(f"检查 {len(to_check)} 个依赖...")
+            status = self.env_mgr.check_packages_installed(to_check, self.signals.log)
+            
+            if self._is_cancelled:
+                self.signals.log.emit("依赖检查已取消\n")
+                self.signals.finished.emit([])
+                return
+            
+            missing_deps = list(sync_specs)
+            for dep in dependencies:
+                if dep in synced:
+                    self.signals.log.emit(f"检查依赖: {dep}... 需要同步（已包含在同步列表中）\n")
+                elif status.get(dep):
+                    self.signals.log.emit(f"检查依赖: {dep}... 已安装\n")
                 else:
-                    self.signals.log.emit(f" 已安装\n")
+                    missing_deps.append(dep)
+                    self.signals.log.emit(f"检查依赖: {dep}... 未安装\n")
+            self.signals.log.emit(f"依赖检查用时 {time.time() - start:.2f} 秒\n")
             
             if missing_deps:
                 self.signals.log.emit(f"\n缺失依赖: {', '.join(missing_deps)}\n")
+                if self.env_mgr.wheelhouse_dir:
+                    available, unavailable = self.env_mgr.split_offline_available(missing_deps, self.signals.log)
+                    if available:
+                        self.signals.log.emit(f"离线 wheel 目录可提供: {', '.join(available)}\n")
+                    if unavailable:
+                        self.signals.log.emit(f"⚠️ 离线 wheel 目录中缺少: {', '.join(unavailable)}\n")
             else:
                 self.signals.log.emit("\n所有依赖均已安装\n")
             
@@ -1238,20 +3973,13 @@ class DependencyInstallWorker(QObject):
         """执行依赖安装"""
         try:
             total = len(self.packages)
-            success_count = 0
-            failed_packages = []
-            
-            for i, pkg in enumerate(self.packages):
-                if self._is_cancelled:
-                    self.signals.log.emit("依赖安装已取消\n")
-                    break
-                
-                self.signals.progress.emit(f"安装依赖 ({i+1}/{total}): {pkg}")
-                
-                if self.env_mgr.install_package(pkg, self.signals.log):
-                    success_count += 1
-                else:
-                    failed_packages.append(pkg)
+            self.signals.progress.emit(f"安装 {total} 个依赖...")
+            # 全部选中的包在一次安装事务中完成
+            failed_packages = self.env_mgr.install_packages(
+                self.packages, self.signals.log,
+                progress=self.signals.progress.emit,
+                is_cancelled=lambda: self._is_cancelled)
+            success_count = total - len(failed_packages)
             
             if failed_packages:
                 self.signals.log.emit(f"\n安装完成: {success_count}/{total} 成功, 失败: {', '.join(failed_packages)}\n")
@@ -1565,16 +4293,91 @@ class DependencySelectionDialog(QDialog):
                 self.selected_dependencies.append(checkbox.text())
         self.accept()
 
+# ===========================
+# 排除预览弹窗
+# ===========================
+class ExclusionProfileDialog(QDialog):
+    """排除预览：列出构建时的全部排除项及各自少编译的模块数，并可确认新的排除建议"""
+    SOURCE_LABELS = {"static": "内置", "learned": "自动学习", "accepted": "已接受", "suggested": "建议"}
+
+    def __init__(self, parent, profile, static_exclusions):
+        super().__init__(parent)
+        self.setWindowTitle("排除预览")
+        self.setMinimumSize(560, 460)
+        self.setModal(True)
+        self.profile = profile
+
+        layout = QVBoxLayout(self)
+        layout.addWidget(QLabel(
+            "下次构建将使用以下 --nofollow-import-to 排除项（模块数和耗时来自最近一次编译报告）：\n"
+            "取消勾选已有项会将其移出配置；勾选建议项即接受该建议。"
+        ))
+
+        self.list_widget = QListWidget()
+        self._checkboxes = []  # (排除项, 来源, 复选框)
+        for name in static_exclusions:
+            self._add_row(name, "static", None, checked=True, enabled=False)
+        for name, info in sorted(profile.entries.items()):
+            self._add_row(name, info.get("source", "accepted"), info, checked=True)
+        for name, info in sorted(profile.suggestions.items(), key=lambda kv: kv[1].get("time", 0), reverse=True):
+            self._add_row(name, "suggested", info, checked=False)
+        layout.addWidget(self.list_widget)
+
+        self.lbl_total = QLabel()
+        layout.addWidget(self.lbl_total)
+        self._update_total()
+
+        btn_layout = QHBoxLayout()
+        btn_layout.addStretch()
+        cancel_btn = QPushButton("取消")
+        cancel_btn.setObjectName("GhostBtn")
+        cancel_btn.clicked.connect(self.reject)
+        btn_layout.addWidget(cancel_btn)
+        save_btn = QPushButton("保存配置")
+        save_btn.setObjectName("PrimaryBtn")
+        save_btn.clicked.connect(self.accept_selection)
+        btn_layout.addWidget(save_btn)
+        layout.addLayout(btn_layout)
+
+    def _add_row(self, name, source, info, checked, enabled=True):
+        if info:
+            detail = f"{info.get('modules', 0)} 个模块 / {info.get('time', 0):.1f} 秒  {info.get('reason', '')}"
+        else:
+            detail = "默认排除"
+        checkbox = QCheckBox(f"[{self.SOURCE_LABELS.get(source, source)}] {name}  —  {detail}")
+        checkbox.setChecked(checked)
+        checkbox.setEnabled(enabled)
+        checkbox.toggled.connect(self._update_total)
+        item = QListWidgetItem(self.list_widget)
+        self.list_widget.addItem(item)
+        self.list_widget.setItemWidget(item, checkbox)
+        self._checkboxes.append((name, source, info, checkbox))
+
+    def _update_total(self):
+        modules = sum(info.get("modules", 0) for _, _, info, cb in self._checkboxes if info and cb.isChecked())
+        cost = sum(info.get("time", 0) for _, _, info, cb in self._checkboxes if info and cb.isChecked())
+        self.lbl_total.setText(f"合计少编译约 {modules} 个模块，节省约 {cost:.1f} 秒优化时间（不含内置排除项）")
+
+    def accept_selection(self):
+        kept = {name for name, source, _, cb in self._checkboxes if source not in ("static", "suggested") and cb.isChecked()}
+        accepted = {name for name, source, _, cb in self._checkboxes if source == "suggested" and cb.isChecked()}
+        self.profile.apply(kept, accepted)
+        self.profile.save()
+        self.accept()
+
 # ===========================
 # 主界面
 # ===========================
 class MainWindow(QMainWindow):
     sig_log_bridge = pyqtSignal(str) # 将信号定义为类属性
+    LOG_FLUSH_INTERVAL = 50  # 日志刷新间隔（毫秒）
+    LOG_MAX_LINES = 5000  # 日志视图保留的最大行数
     sig_done = pyqtSignal(bool) # 定义结束信号
     sig_cancelled = pyqtSignal()  # 新增：打包取消信号
     sig_dep_check_done = pyqtSignal(list)  # 依赖检查完成信号
     sig_dep_install_done = pyqtSignal(list)  # 依赖安装完成信号
     sig_progress = pyqtSignal(int)  # 新增：进度更新信号
+    sig_toolchains_ready = pyqtSignal()  # 编译后端后台探测完成信号
 
     def __init__(self):
         super().__init__()
@@ -1592,6 +4395,10 @@ class MainWindow(QMainWindow):
         # 打包进程相关
         self._current_runner = None  # 当前运行的 ToolRunner
         self._is_packing = False  # 是否正在打包
+        self._last_tool = None  # 最近一次打包使用的工具（用于构建后的排除建议）
+        self._dep_check_started = None  # 打包前依赖检查的开始时间（记入构建历史）
+        self._eta = None  # 按构建历史预计的总耗时（秒）
+        self._progress_stages = ProgressParser.NUITKA_STAGES  # 当前进度条的阶段区间（可能已按历史校准）
         
         # 自动加载 name.png 图标
         icon_path = os.path.join(BASE_DIR, "name.png")
@@ -1599,13 +4406,19 @@ class MainWindow(QMainWindow):
             self.setWindowIcon(QIcon(icon_path))
             
         self.timer = QTimer(); self.timer.timeout.connect(self.tick); self.start_ts = 0
+        # 日志先进入缓冲，定时批量刷新到日志视图，避免每行都触发重新排版
+        self.log_buffer = LogBuffer()
+        self.log_timer = QTimer(); self.log_timer.timeout.connect(self._flush_log); self.log_timer.start(self.LOG_FLUSH_INTERVAL)
         self.sig_log_bridge.connect(self.append_log) # 连接信号到日志追加方法
         self.sig_done.connect(self.done) # 连接信号到处理函数
         self.sig_cancelled.connect(self._on_cancelled)  # 连接取消信号
         self.sig_dep_check_done.connect(self._on_dep_check_done)  # 连接依赖检查完成信号
         self.sig_dep_install_done.connect(self._on_dep_install_done)  # 连接依赖安装完成信号
         self.sig_progress.connect(self._update_progress)  # 连接进度信号
+        self.sig_toolchains_ready.connect(self._update_backend_options)  # 后台探测完成后刷新后端列表
         self.init_ui()
+        # 在后台探测编译后端，避免 vswhere/where 阻塞界面
+        TOOLCHAINS.start_background_probe(self.sig_toolchains_ready.emit)
 
     def init_ui(self):
         central = QWidget()
@@ -1713,6 +4526,15 @@ class MainWindow(QMainWindow):
         btn_sel = QPushButton("选择", objectName="GhostBtn"); btn_sel.clicked.connect(self.sel_icon)
         h_icon.addWidget(lbl_icon); h_icon.addWidget(self.txt_icon); h_icon.addWidget(btn_make); h_icon.addWidget(btn_sel)
         l_res.addLayout(h_icon)
+        h_wheel = QHBoxLayout()
+        lbl_wheel = QLabel("离线仓库:"); lbl_wheel.setFixedWidth(70)
+        self.txt_wheelhouse = QLineEdit(); self.txt_wheelhouse.setPlaceholderText("可选，wheel 目录（离线安装依赖）")
+        self.txt_wheelhouse.setText(self.env_mgr.wheelhouse_dir or "")
+        self.txt_wheelhouse.setToolTip("设置后依赖从该目录离线安装（--no-index --find-links），目录中没有的包会立即报告失败")
+        self.txt_wheelhouse.editingFinished.connect(self._on_wheelhouse_changed)
+        btn_wheel = QPushButton("选择", objectName="GhostBtn"); btn_wheel.clicked.connect(self.sel_wheelhouse)
+        h_wheel.addWidget(lbl_wheel); h_wheel.addWidget(self.txt_wheelhouse); h_wheel.addWidget(btn_wheel)
+        l_res.addLayout(h_wheel)
         left_v_layout.addWidget(card_res)
 
         # 4. 选项
@@ -1754,6 +4576,28 @@ class MainWindow(QMainWindow):
         self.lbl_nocon = QLabel("隐藏控制台")
         h_nocon.addWidget(self.chk_nocon)
         h_nocon.addWidget(self.lbl_nocon)
+        h_nocon.addSpacing(16)
+        # 增量编译选项
+        self.chk_incremental = ToggleSwitch(self, w=38, h=22); self.chk_incremental.set_on(True)
+        self.lbl_incremental = QLabel("增量编译")
+        self.lbl_incremental.setToolTip(
+            "保留构建目录（位于输出目录之外，按项目和配置区分）\n"
+            "Nuitka：再次打包时复用未变化的 C 代码和目标文件，小改动可大幅缩短编译时间\n"
+            "PyInstaller：复用 spec 文件和分析缓存，解释器或依赖变化时自动重新分析\n"
+            "构建成功、失败或取消都不会删除该目录"
+        )
+        h_nocon.addWidget(self.chk_incremental)
+        h_nocon.addWidget(self.lbl_incremental)
+        h_nocon.addSpacing(16)
+        # 构建结果缓存选项
+        self.chk_build_cache = ToggleSwitch(self, w=38, h=22); self.chk_build_cache.set_on(True)
+        self.lbl_build_cache = QLabel("结果缓存")
+        self.lbl_build_cache.setToolTip(
+            "源码、解释器、已安装依赖、打包工具版本和打包选项都未变化时\n"
+            "直接恢复上次的打包结果，跳过整个打包流程"
+        )
+        h_nocon.addWidget(self.chk_build_cache)
+        h_nocon.addWidget(self.lbl_build_cache)
         h_nocon.addStretch()
         l_opt.addLayout(h_nocon)
         l_opt.addSpacing(10)
@@ -1829,7 +4673,27 @@ class MainWindow(QMainWindow):
             "Nuitka 对 PySide6 的支持优于 PyQt6\n"
             "如果使用 PyQt6 遇到问题（如线程不工作），建议切换到 PySide6"
         )
-        l_opt.addWidget(lbl_gui_hint)
+        h_gui_hint = QHBoxLayout()
+        h_gui_hint.addWidget(lbl_gui_hint)
+        h_gui_hint.addStretch()
+        # 精简 Qt 选项（仅 Nuitka 使用）
+        self.chk_slim_qt = ToggleSwitch(self, w=38, h=22)
+        self.lbl_slim_qt = QLabel("精简 Qt")
+        self.lbl_slim_qt.setToolTip(
+            "不打包 Qt 翻译文件和项目用不到的 Qt 插件\n"
+            "未使用 OpenGL/Quick/3D 等模块时同时去掉 opengl32sw.dll 和 d3dcompiler DLL\n"
+            "可明显减小体积；若程序需要 Qt 自带的界面翻译请关闭"
+        )
+        h_gui_hint.addWidget(self.chk_slim_qt)
+        h_gui_hint.addWidget(self.lbl_slim_qt)
+        h_gui_hint.addSpacing(8)
+        # 排除预览（Nuitka 项目排除配置）
+        self.btn_exclusions = QPushButton("排除预览", objectName="GhostBtn")
+        self.btn_exclusions.setCursor(Qt.CursorShape.PointingHandCursor)
+        self.btn_exclusions.setToolTip("查看并编辑当前项目的排除配置（Nuitka 与 PyInstaller 共用），以及每项排除少编译的模块数")
+        self.btn_exclusions.clicked.connect(self.show_exclusions)
+        h_gui_hint.addWidget(self.btn_exclusions)
+        l_opt.addLayout(h_gui_hint)
         
         # 编译器切换时更新后端选项的可见性
         self.rb_nuitka.toggled.connect(self._on_compiler_changed)
@@ -1874,14 +4738,23 @@ class MainWindow(QMainWindow):
         right_v_layout.addWidget(self.btn_run)
 
         # 6. 日志
-        self.txt_log = QTextEdit(objectName="LogArea"); self.txt_log.setPlaceholderText("Ready..."); self.txt_log.setMinimumHeight(150); self.txt_log.setMaximumHeight(300); self.txt_log.setReadOnly(True)
+        self.txt_log = QPlainTextEdit(objectName="LogArea"); self.txt_log.setPlaceholderText("Ready..."); self.txt_log.setMinimumHeight(150); self.txt_log.setMaximumHeight(300); self.txt_log.setReadOnly(True)
+        self.txt_log.setMaximumBlockCount(self.LOG_MAX_LINES)  # 完整日志在磁盘文件中，视图只保留最近的行
         bottom_v_layout.addWidget(self.txt_log)
 
     def _update_backend_options(self):
-        """更新编译后端选项"""
+        """更新编译后端选项（探测结果来自编译后端注册表，不会阻塞界面）"""
+        if not TOOLCHAINS.is_ready:
+            self.cmb_backend.clear()
+            self.cmb_backend.addItem("自动选择")
+            self.cmb_backend.setToolTip("正在后台检测编译器...")
+            return
+        current = self.cmb_backend.currentText()
         self.cmb_backend.clear()
         backends, has_msvc, (mingw_type, mingw_path) = get_available_backends()
         self.cmb_backend.addItems(backends)
+        if current in backends:
+            self.cmb_backend.setCurrentIndex(backends.index(current))
         
         # 更新工具提示以显示检测结果
         status_lines = ["编译器检测结果:"]
@@ -1909,7 +4782,16 @@ class MainWindow(QMainWindow):
         # 只有 Nuitka 才显示编译后端选项
         self.cmb_backend.setEnabled(is_nuitka)
         if is_nuitka:
-            self._update_backend_options()  # 刷新检测结果
+            self._update_backend_options()  # 刷新检测结果（从内存读取）
+
+    def show_exclusions(self):
+        """打开当前项目的排除预览"""
+        tgt = self.txt_file.text()
+        if not tgt or not os.path.isfile(tgt):
+            QMessageBox.warning(self, "提示", "请先选择入口脚本")
+            return
+        tool = PyInstallerTool if self.rb_pyi.isChecked() else NuitkaTool
+        ExclusionProfileDialog(self, ExclusionProfile.load(tgt), tool.STATIC_EXCLUSIONS).exec()
 
     # 逻辑部分
     def sel_file(self):
@@ -1924,6 +4806,18 @@ class MainWindow(QMainWindow):
     def sel_icon(self):
         f, _ = QFileDialog.getOpenFileName(self, "Icon", "", "*.ico"); 
         if f: self.txt_icon.setText(f)
+    def sel_wheelhouse(self):
+        d = QFileDialog.getExistingDirectory(self, "Wheelhouse")
+        if d:
+            self.txt_wheelhouse.setText(d)
+            self._on_wheelhouse_changed()
+    def _on_wheelhouse_changed(self):
+        path = self.txt_wheelhouse.text()
+        if self.env_mgr.set_wheelhouse(path):
+            manifest = self.env_mgr.get_wheelhouse_manifest()
+            self.sig_log_bridge.emit(f"离线 wheel 目录: {path}（{len(manifest)} 个发行包）\n")
+        elif path.strip():
+            self.sig_log_bridge.emit(f"离线 wheel 目录不存在: {path}，将使用在线镜像\n")
     def make_icon(self):
         if not HAS_PILLOW: return QMessageBox.warning(self, "Tips", "Install Pillow first.")
         IconDialog(self, lambda p: self.txt_icon.setText(p), self.txt_out.text() or os.getcwd()).exec()
@@ -1953,24 +4847,39 @@ class MainWindow(QMainWindow):
             self.lbl_env.setText(f"手动: {f} ({python_version})")
         else: self.rb_auto.setChecked(True)
     def tick(self):
-        s = int(time.time() - self.start_ts)
-        self.lbl_timer.setText(f"{s//60:02d}:{s%60:02d}")
+        elapsed = time.time() - self.start_ts
+        text = _format_duration(int(elapsed))
+        if self._eta:
+            remaining = self._eta - elapsed
+            text += f" · 剩余约 {_format_duration(remaining)}" if remaining >= 0 else f" · 超出预计 {_format_duration(-remaining)}"
+        self.lbl_timer.setText(text)
+    
+    STAGE_LABELS = {
+        'analyzing': "分析模块", 'module_analysis': "分析模块", 'creating': "生成 C 代码",
+        'compiling': "编译中", 'linking': "链接中", 'processing': "处理资源", 'building': "构建中",
+        'finishing': "即将完成",
+    }
     
     def _update_progress(self, value: int):
-        """更新进度条"""
+        """更新进度条（阶段名称按当前的阶段区间确定）"""
         self.progress_bar.setValue(value)
         if value >= 100:
             self.progress_bar.setFormat("100% - 完成!")
-        elif value >= 85:
-            self.progress_bar.setFormat(f"{value}% - 即将完成...")
-        elif value >= 40:
-            self.progress_bar.setFormat(f"{value}% - 编译中...")
-        elif value >= 10:
-            self.progress_bar.setFormat(f"{value}% - 分析模块...")
-        else:
-            self.progress_bar.setFormat(f"{value}% - 准备中...")
+            return
+        label = "准备中"
+        if value > 0:
+            for stage, (start, _) in self._progress_stages.items():
+                if start <= value:
+                    label = self.STAGE_LABELS.get(stage, label)
+        self.progress_bar.setFormat(f"{value}% - {label}...")
     def append_log(self, t):
-        self.txt_log.append(t.strip())
+        self.log_buffer.write(t)
+    def _flush_log(self):
+        """把缓冲中的日志一次性追加到日志视图"""
+        text = self.log_buffer.drain()
+        if not text:
+            return
+        self.txt_log.appendPlainText(text.rstrip("\n"))
         # 确保滚动到底部
         scrollbar = self.txt_log.verticalScrollBar()
         scrollbar.setValue(scrollbar.maximum())
@@ -2231,10 +5140,12 @@ class MainWindow(QMainWindow):
         """打包结束后重置状态"""
         self._is_packing = False
         self._current_runner = None
+        self.log_buffer.close_file()
         self.timer.stop()
         self.progress_bar.setVisible(False)
         self.progress_bar.setValue(0)
         self.lbl_timer.setVisible(False)
+        self._eta = None
         self._set_btn_to_normal_mode()
 
     def start(self):
@@ -2249,9 +5160,11 @@ class MainWindow(QMainWindow):
             self.btn_run.setEnabled(False)
             self.btn_run.setText("检查依赖中...")
             self._pending_start_after_install = True  # 标记在检查/安装完成后启动打包
+            self._dep_check_started = time.time()
             self._start_dep_check(tgt)
         else:
             # 直接开始打包
+            self._dep_check_started = None
             self._do_start_packing()
     
     def _do_start_packing(self):
@@ -2259,6 +5172,11 @@ class MainWindow(QMainWindow):
         self._is_packing = True
         self.txt_log.clear()
         self.start_ts = time.time()
+        self._dep_check_time = self.start_ts - self._dep_check_started if self._dep_check_started else None
+        self._dep_check_started = None
+        self._eta = None
+        self._progress_stages = ProgressParser.PYINSTALLER_STAGES if self.rb_pyi.isChecked() else ProgressParser.NUITKA_STAGES
+        self.lbl_timer.setText("00:00")
         self.lbl_timer.setVisible(True)
         self.timer.start(1000)
         self._pending_start_after_install = False
@@ -2279,6 +5197,13 @@ class MainWindow(QMainWindow):
             out = self.txt_out.text()
             icon = self.txt_icon.text()
             nocon = self.chk_nocon._on
+            
+            # 完整日志写入输出目录
+            if out and tgt:
+                os.makedirs(out, exist_ok=True)
+                log_path = os.path.join(out, f"{os.path.splitext(os.path.basename(tgt))[0]}-build.log")
+                if self.log_buffer.open_file(log_path):
+                    self.sig_log_bridge.emit(f"完整日志: {log_path}\n")
             compress_mode = self.cmb_compress.currentIndex()  # 0=双层压缩, 1=仅内压缩, 2=仅UPX, 3=不压缩
             
             # 获取编译后端选择
@@ -2297,7 +5222,8 @@ class MainWindow(QMainWindow):
                 if jobs_data and jobs_data > 0:
                     parallel_jobs = jobs_data
             
-            tool = PyInstallerTool(self.env_mgr) if self.rb_pyi.isChecked() else NuitkaTool(self.env_mgr, backend_choice, parallel_jobs)
+            tool = PyInstallerTool(self.env_mgr, self.chk_incremental._on) if self.rb_pyi.isChecked() else NuitkaTool(self.env_mgr, backend_choice, parallel_jobs, self.chk_incremental._on, self.chk_slim_qt._on)
+            self._last_tool = tool
             
             # 仅检查打包工具，不自动安装，因为用户已经有依赖管理选项
             if not tool.check_installed():
@@ -2305,6 +5231,9 @@ class MainWindow(QMainWindow):
                 self.sig_done.emit(False)
                 return
 
+            # 分析整个项目（依赖检查、Nuitka 与 PyInstaller 共用，结果会被记忆）
+            PROJECT_ANALYZER.analyze(tgt, self.sig_log_bridge)
+
             # 如果使用 Nuitka，提前检测 GUI 框架并给出警告
             if isinstance(tool, NuitkaTool):
                 detected_guis = tool._detect_gui_frameworks(tgt, self.sig_log_bridge)
@@ -2312,14 +5241,68 @@ class MainWindow(QMainWindow):
                     self.sig_log_bridge.emit(f"检测到 GUI 框架: {', '.join(detected_guis)}\n")
 
             cmd, env = tool.get_cmd(tgt, out, nocon, icon, compress_mode)
+            if tool._workspace:
+                self.sig_log_bridge.emit(f"增量编译已启用，构建目录: {tool._workspace}\n")
+            if isinstance(tool, PyInstallerTool) and tool._workspace and not tool._fingerprint:
+                self.sig_log_bridge.emit("复用已有的 spec 文件和分析缓存\n")
+            if isinstance(tool, NuitkaTool) and tool._ccache:
+                self.sig_log_bridge.emit(f"编译缓存已启用: {tool._ccache[0]}（缓存目录 {env['CCACHE_DIR']}，上限 {tool.CCACHE_MAX_SIZE}）\n")
+            if tool.applied_rules:
+                self.sig_log_bridge.emit(f"应用第三方包精简规则（规则库版本 {ANTI_BLOAT_RULES_VERSION}）:\n")
+                for rule, _, _ in tool.applied_rules:
+                    self.sig_log_bridge.emit(f"  {rule['id']}: {rule['savings']}\n")
+            if isinstance(tool, NuitkaTool) and tool.qt_modules:
+                self.sig_log_bridge.emit(f"Qt 子模块: {', '.join(tool.qt_modules)}\n")
+            if tool.profile_exclusions:
+                self.sig_log_bridge.emit(f"项目排除配置: {', '.join(tool.profile_exclusions)}\n")
+            
+            # 构建结果缓存：输入完全相同时直接恢复上次的产物
+            fingerprint = None
+            if self.chk_build_cache._on:
+                fingerprint = BUILD_CACHE.fingerprint(tool, tgt, icon, self.env_mgr)
+                if fingerprint and BUILD_CACHE.restore(fingerprint, out, self.sig_log_bridge.emit):
+                    self.sig_progress.emit(100)
+                    self.sig_done.emit(True)
+                    return
+            
             self.sig_log_bridge.emit(f"Run: {' '.join(cmd)}\n")
             
             # 确定工具名称
             tool_name = 'pyinstaller' if self.rb_pyi.isChecked() else 'nuitka'
             
+            # 构建历史：按本项目/配置的历史耗时预计剩余时间并校准进度条
+            history_key = BUILD_HISTORY.key(tool, tgt)
+            estimate = BUILD_HISTORY.estimate(history_key)
+            if estimate:
+                self._eta = estimate["total"]
+                self.sig_log_bridge.emit(f"构建历史: 最近 {estimate['samples']} 次成功构建的中位耗时 "
+                                         f"{_format_duration(estimate['total'])}，进度按本项目各阶段的耗时估算\n")
+            dep_check_time = self._dep_check_time
+            
+            def post_build(success, log):
+                finished = time.time()
+                success = tool.post_build(success, log)
+                if success and fingerprint:
+                    BUILD_CACHE.store(fingerprint, out, tool.artifact_names(tgt), log)
+                # 记录本次构建：各阶段耗时、模块数和产物大小；成功时与历史中位数比较
+                phases = dict(runner.phase_times, prepare=prepare_time, cleanup=time.time() - finished)
+                if dep_check_time is not None:
+                    phases["dep_check"] = dep_check_time
+                total = time.time() - self.start_ts
+                if success and estimate:
+                    for line in BUILD_HISTORY.regressions(estimate, total, phases):
+                        log(line)
+                report = getattr(tool, "report", None)
+                BUILD_HISTORY.record(history_key, tool.name, total, phases, success,
+                                     len(report.modules) if report else None,
+                                     BUILD_HISTORY.output_size(out, tool.artifact_names(tgt)) if success else None)
+                return success
+            
             # 创建 runner 并保存引用
-            runner = ToolRunner(cmd, env, tool_name)
+            runner = ToolRunner(cmd, env, tool_name, post_build, self.log_buffer.write, tool.build_dir,
+                                estimate["phases"] if estimate else None)
             self._current_runner = runner
+            self._progress_stages = runner.stages
             
             # 连接信号
             runner.signals.log.connect(self.sig_log_bridge.emit)
@@ -2328,6 +5311,7 @@ class MainWindow(QMainWindow):
             runner.signals.progress.connect(self.sig_progress.emit)
             
             # 运行
+            prepare_time = time.time() - self.start_ts
             runner.run()
             
         except Exception as e:
@@ -2346,8 +5330,29 @@ class MainWindow(QMainWindow):
                 self.sig_log_bridge.emit(f"无法打开输出目录: {e}\n")
         else:
             QMessageBox.critical(self, "错误", "打包失败，请检查日志。")
+        
+        # 编译报告给出了新的排除建议时，询问是否查看
+        tool, self._last_tool = self._last_tool, None
+        if isinstance(tool, NuitkaTool) and tool.new_suggestions:
+            reply = QMessageBox.question(
+                self, "排除建议",
+                f"编译报告给出了 {len(tool.new_suggestions)} 条新的排除建议，是否现在查看？\n"
+                "接受的建议会保存到项目排除配置，在下次构建时生效。"
+            )
+            if reply == QMessageBox.StandardButton.Yes:
+                self.show_exclusions()
 
 if __name__ == "__main__":
+    # 项目分析使用进程池，打包成可执行文件后需要 freeze_support
+    import multiprocessing
+    multiprocessing.freeze_support()
+    # 进度解析基准测试：python main.py --bench-progress [日志文件] [nuitka|pyinstaller]
+    if "--bench-progress" in sys.argv:
+        args = sys.argv[sys.argv.index("--bench-progress") + 1:]
+        tool_arg = next((a for a in args if a.lower() in ("nuitka", "pyinstaller")), "nuitka")
+        log_arg = next((a for a in args if a.lower() not in ("nuitka", "pyinstaller")), None)
+        ProgressParser.run_benchmark(log_arg, tool_arg.lower())
+        sys.exit(0)
     # 使用类名直接调用静态/类方法，不需要实例
     if hasattr(Qt.ApplicationAttribute, 'AA_EnableHighDpiScaling'):
         QApplication.setAttribute(Qt.ApplicationAttribute.AA_EnableHighDpiScaling, True)
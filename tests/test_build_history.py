@@ -0,0 +1,24 @@
+"""BuildHistory 回退提示的测试（不涉及 SQLite）。"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import BuildHistory  # noqa: E402
+
+
+def test_regressions_rank_only_parser_stages():
+    estimate = {"samples": 5, "total": 60.0,
+                "phases": {"prepare": 1.0, "dep_check": 2.0, "compiling": 40.0, "linking": 10.0}}
+    phases = {"prepare": 30.0, "dep_check": 120.0, "compiling": 70.0, "linking": 12.0, "cleanup": 20.0}
+    lines = BuildHistory().regressions(estimate, 130.0, phases)
+    assert lines and "慢" in lines[0]
+    details = "".join(lines[1:])
+    assert "C 编译" in details and "链接" in details
+    for label in ("依赖检查", "项目分析", "收尾"):
+        assert label not in details
+
+
+def test_no_regression_for_small_slowdown():
+    estimate = {"samples": 5, "total": 10.0, "phases": {"compiling": 8.0}}
+    assert BuildHistory().regressions(estimate, 16.0, {"compiling": 14.0}) == []
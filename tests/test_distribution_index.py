@@ -0,0 +1,51 @@
+"""DistributionIndex 的测试：导入名 -> 发行包名取自元数据，命名空间包按二级包名记录。"""
+import os
+import sys
+import zipfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main  # noqa: E402
+
+
+def write_dist(site, name, version, files, top_level=None):
+    """在 site 目录中写出一个已安装的发行包（只含 RECORD 和可选的 top_level.txt）"""
+    dist_info = site / f"{name}-{version}.dist-info"
+    dist_info.mkdir(parents=True)
+    for path in files:
+        target = site / path
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_text("")
+    (dist_info / "RECORD").write_text("".join(f"{p},,\n" for p in files) + f"{dist_info.name}/RECORD,,\n")
+    if top_level is not None:
+        (dist_info / "top_level.txt").write_text("\n".join(top_level) + "\n")
+
+
+def test_installed_mapping_includes_namespace_subpackages(tmp_path, monkeypatch):
+    monkeypatch.setenv("LOCALAPPDATA", str(tmp_path / "cache"))
+    site = tmp_path / "site"
+    write_dist(site, "protobuf", "5.0", ["google/protobuf/__init__.py", "google/_upb/_message.so"], ["google"])
+    write_dist(site, "googleapis_common_protos", "1.0", ["google/api/__init__.py"], ["google"])
+    write_dist(site, "python_docx", "1.1", ["docx/__init__.py"], ["docx"])
+    installed, wheels = main.DistributionIndex().refresh([str(site)])
+    assert installed["google.protobuf"] == ["protobuf"]
+    assert installed["google.api"] == ["googleapis_common_protos"]
+    assert installed["docx"] == ["python_docx"]
+    assert "docx.x" not in installed and wheels == {}
+
+
+def test_wheel_mapping_from_record(tmp_path, monkeypatch):
+    monkeypatch.setenv("LOCALAPPDATA", str(tmp_path / "cache"))
+    house = tmp_path / "house"
+    house.mkdir()
+    with zipfile.ZipFile(house / "PyMuPDF-1.24.0-py3-none-any.whl", "w") as z:
+        for path in ("fitz/__init__.py", "pymupdf/__init__.py", "PyMuPDF-1.24.0.dist-info/RECORD"):
+            z.writestr(path, "fitz/__init__.py,,\npymupdf/__init__.py,,\n" if path.endswith("RECORD") else "")
+    _, wheels = main.DistributionIndex().refresh([], str(house))
+    assert wheels["fitz"] == ["PyMuPDF"] and wheels["pymupdf"] == ["PyMuPDF"]
+
+
+def test_namespace_subpackages():
+    paths = ["google/protobuf/__init__.py,sha256=x,1", "google/protobuf/json_format.py", "six.py",
+             "requests/__init__.py", "requests/adapters/x.py", "../../bin/tool", "pkg-1.0.dist-info/RECORD"]
+    assert main._namespace_subpackages(paths) == ["google.protobuf"]
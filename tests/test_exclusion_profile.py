@@ -0,0 +1,56 @@
+"""ExclusionProfile 自动学习的测试：只有没有被包外模块导入的测试代码才会自动写入配置。"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import ExclusionProfile, NuitkaReportAnalyzer  # noqa: E402
+
+REPORT = """<?xml version='1.0' encoding='utf8'?>
+<nuitka-compilation-report nuitka_version="4.3" completion="yes">
+  <module name="__main__" kind="PythonMainModule" usage="root" source_path="${cwd}/app.py">
+    <optimization-time pass="1" time="0.10" />
+    <module_usages>
+      <module_usage name="pkg" finding="absolute" line="1" />
+    </module_usages>
+  </module>
+  <module name="pkg" kind="CompiledPythonPackage" usage="import" distribution="pkg" source_path="${sys.prefix}/pkg/__init__.py">
+    <optimization-time pass="1" time="0.20" />
+    <module_usages>
+      <module_usage name="pkg.testing" finding="absolute" line="3" />
+      <module_usage name="pkg.tests" finding="absolute" line="4" />
+    </module_usages>
+  </module>
+  <module name="pkg.testing" kind="CompiledPythonPackage" usage="import" distribution="pkg" source_path="${sys.prefix}/pkg/testing/__init__.py">
+    <optimization-time pass="1" time="0.50" />
+  </module>
+  <module name="pkg.tests" kind="CompiledPythonPackage" usage="import" distribution="pkg" source_path="${sys.prefix}/pkg/tests/__init__.py">
+    <optimization-time pass="1" time="0.30" />
+    <module_usages>
+      <module_usage name="pkg.tests.test_core" finding="absolute" line="1" />
+    </module_usages>
+  </module>
+  <module name="pkg.tests.test_core" kind="CompiledPythonModule" usage="import" distribution="pkg" source_path="${sys.prefix}/pkg/tests/test_core.py">
+    <optimization-time pass="1" time="0.40" />
+  </module>
+  <module name="pkg.extra.tests" kind="CompiledPythonPackage" usage="plugin" distribution="pkg" source_path="${sys.prefix}/pkg/extra/tests/__init__.py">
+    <optimization-time pass="1" time="0.60" />
+  </module>
+</nuitka-compilation-report>
+"""
+
+
+def test_learn_only_unimported_tests(tmp_path):
+    path = tmp_path / "report.xml"
+    path.write_text(REPORT, encoding="utf-8")
+    report = NuitkaReportAnalyzer().analyze(str(path))
+    assert {value for value, kind, *_ in report.candidates if kind == "tests"} == {
+        "pkg.testing", "pkg.tests", "pkg.extra.tests"}
+    assert report.outside_importer("pkg.tests") == "pkg"
+    assert report.outside_importer("pkg.extra.tests") is None
+
+    profile = ExclusionProfile(str(tmp_path / ExclusionProfile.FILE_NAME))
+    learned, suggested = profile.learn(report)
+    assert learned == ["pkg.extra.tests"]
+    assert set(suggested) == {"pkg.testing", "pkg.tests"}
+    assert "pkg" in profile.suggestions["pkg.tests"]["reason"]
@@ -0,0 +1,107 @@
+"""EnvManager.install_packages 在本地 wheel 目录上的测试（需要 uv，用它创建临时虚拟环境并安装）。"""
+import base64
+import hashlib
+import os
+import subprocess
+import sys
+import zipfile
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main  # noqa: E402
+
+UV = main.find_uv()
+needs_uv = pytest.mark.skipif(not UV, reason="需要 uv")
+
+
+class Signal:
+    def __init__(self):
+        self.lines = []
+
+    def emit(self, text):
+        self.lines.append(text)
+
+    @property
+    def text(self):
+        return "".join(self.lines)
+
+
+def build_wheel(house, name, version, requires=()):
+    """写出只含一个空包的纯 Python wheel"""
+    dist_info = f"{name}-{version}.dist-info"
+    files = {
+        f"{name}/__init__.py": f"__version__ = '{version}'\n",
+        f"{dist_info}/METADATA": f"Metadata-Version: 2.1\nName: {name}\nVersion: {version}\n"
+                                 + "".join(f"Requires-Dist: {r}\n" for r in requires),
+        f"{dist_info}/WHEEL": "Wheel-Version: 1.0\nGenerator: test\nRoot-Is-Purelib: true\nTag: py3-none-any\n",
+    }
+    record = []
+    with zipfile.ZipFile(os.path.join(house, f"{name}-{version}-py3-none-any.whl"), "w") as z:
+        for path, content in files.items():
+            z.writestr(path, content)
+            digest = base64.urlsafe_b64encode(hashlib.sha256(content.encode()).digest()).rstrip(b"=").decode()
+            record.append(f"{path},sha256={digest},{len(content)}")
+        record.append(f"{dist_info}/RECORD,,")
+        z.writestr(f"{dist_info}/RECORD", "\n".join(record) + "\n")
+
+
+@pytest.fixture
+def env(tmp_path, monkeypatch):
+    """装有 alpha 1.0 的临时虚拟环境，wheel 目录中有 alpha 1.0/2.0 和依赖 alpha==1.0 的 beta"""
+    monkeypatch.setenv("LOCALAPPDATA", str(tmp_path / "cache"))
+    house = tmp_path / "house"
+    house.mkdir()
+    build_wheel(str(house), "alpha", "1.0")
+    build_wheel(str(house), "alpha", "2.0")
+    build_wheel(str(house), "beta", "1.0", ["alpha==1.0"])
+    venv = tmp_path / "venv"
+    subprocess.run([UV, "venv", "-q", "--python", sys.executable, str(venv)], check=True)
+    python = str(venv / ("Scripts/python.exe" if os.name == "nt" else "bin/python"))
+    mgr = main.EnvManager()
+    mgr.set_python_path(python)
+    mgr.installer_choice = "uv"
+    assert mgr.set_wheelhouse(str(house))
+    assert mgr.install_packages(["alpha==1.0"], Signal()) == []
+    return mgr
+
+
+@needs_uv
+def test_install_reports_uv_failure_reason(env):
+    signal = Signal()
+    assert env.install_packages(["alpha==3.0"], signal) == ["alpha==3.0"]
+    assert "安装依赖 alpha==3.0 失败: " in signal.text
+    assert "no version of alpha==3.0" in signal.text
+    assert "已安装版本" not in signal.text
+
+
+@needs_uv
+def test_conflict_keeps_old_version_and_fails(env):
+    signal = Signal()
+    failed = env.install_packages(["beta", "alpha==2.0"], signal)
+    assert sorted(failed) == ["alpha==2.0", "beta"]
+    assert "安装依赖 beta 失败: cause: Because all versions of beta" in signal.text
+    assert "安装依赖 alpha==2.0 失败: 已安装版本 1.0 不满足 alpha==2.0" in signal.text
+    assert env.get_installed_distributions()["alpha"] == "1.0"
+
+
+@needs_uv
+def test_install_upgrade_succeeds(env):
+    signal = Signal()
+    assert env.install_packages(["alpha==2.0"], signal) == []
+    assert "依赖 alpha==2.0 安装成功" in signal.text
+    assert env.get_installed_distributions()["alpha"] == "2.0"
+
+
+def test_uv_fallback_is_logged(monkeypatch):
+    monkeypatch.setattr(main, "find_uv", lambda: None)
+    mgr = main.EnvManager()
+    mgr.installer_choice = "uv"
+    signal = Signal()
+    assert mgr.get_installer(signal).name == "pip"
+    assert "改用 pip" in signal.text
+    mgr.installer_choice = "auto"
+    signal = Signal()
+    assert mgr.get_installer(signal).name == "pip"
+    assert signal.text == ""
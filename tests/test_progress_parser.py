@@ -0,0 +1,139 @@
+"""ProgressParser 在真实构建日志上的回归测试。
+
+logs/ 下的日志取自实际运行：Nuitka 4.3（onefile，以及带 --show-scons --show-modules 的 standalone）和 PyInstaller 6.22。
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import ProgressParser  # noqa: E402
+
+LOG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "logs")
+
+LOGS = [
+    ("nuitka.log", "nuitka"),
+    ("nuitka-verbose.log", "nuitka"),
+    ("pyinstaller.log", "pyinstaller"),
+]
+
+
+def read_log(name):
+    with open(os.path.join(LOG_DIR, name), "r", encoding="utf-8") as f:
+        return f.readlines()
+
+
+def feed(parser, lines):
+    """逐行解析，返回 [(进度, 行)]"""
+    return [(parser.parse_line(line), line) for line in lines]
+
+
+@pytest.mark.parametrize("name,tool", LOGS)
+def test_progress_is_monotonic_and_finishes(name, tool):
+    parser = ProgressParser(tool)
+    last = 0
+    for progress, line in feed(parser, read_log(name)):
+        assert progress >= last, f"进度倒退: {last} -> {progress}（{line.strip()}）"
+        last = progress
+    assert last == 100
+    assert parser.current_stage == "finishing"
+
+
+@pytest.mark.parametrize("name,tool", LOGS)
+def test_stage_order(name, tool):
+    parser = ProgressParser(tool)
+    feed(parser, read_log(name))
+    assert [stage for stage, _ in parser.timeline] == list(parser.stages)
+
+
+@pytest.mark.parametrize("name,tool,marker,stage,progress", [
+    ("nuitka.log", "nuitka", "Starting Python compilation", "analyzing", 0),
+    ("nuitka.log", "nuitka", "Completed Python level compilation", "creating", 25),
+    ("nuitka.log", "nuitka", "Running C compilation via Scons", "compiling", 40),
+    ("nuitka.log", "nuitka", "Backend C linking", "linking", 85),
+    ("nuitka.log", "nuitka", "Creating single file", "finishing", 95),
+    ("nuitka-verbose.log", "nuitka", "Running C compilation via Scons", "compiling", 40),
+    ("nuitka-verbose.log", "nuitka", "Removing build directory", "finishing", 95),
+    ("pyinstaller.log", "pyinstaller", "Analyzing run-time hooks", "analyzing", 25),
+    ("pyinstaller.log", "pyinstaller", "Looking for dynamic libraries", "processing", 40),
+    ("pyinstaller.log", "pyinstaller", "Building PKG", "building", 65),
+    ("pyinstaller.log", "pyinstaller", "Building EXE", "finishing", 90),
+])
+def test_checkpoints(name, tool, marker, stage, progress):
+    parser = ProgressParser(tool)
+    for line in read_log(name):
+        value = parser.parse_line(line)
+        if marker in line:
+            assert (value, parser.current_stage) == (progress, stage)
+            return
+    pytest.fail(f"日志中没有 {marker!r}")
+
+
+def test_compiler_lines_count_within_compiling():
+    parser = ProgressParser("nuitka")
+    values = []
+    for line in read_log("nuitka-verbose.log"):
+        value = parser.parse_line(line)
+        if "Backend C linking" in line:
+            break
+        if line.startswith("gcc "):
+            values.append((value, parser.current_stage))
+    assert values and all(40 <= value < 85 and stage == "compiling" for value, stage in values)
+    assert values[-1][0] > values[0][0]
+
+
+def test_scons_percent():
+    parser = ProgressParser("nuitka")
+    parser.parse_line("Nuitka: Running C compilation via Scons.\n")
+    assert parser.parse_line("Nuitka-Scons: Compiling 50% done\n") == 62
+    assert parser.parse_line("scons: 80%\n") == 76
+    assert parser.parse_line("Nuitka-Scons: Compiling 10% done\n") == 76
+
+
+def test_memo_does_not_change_result():
+    """同一 (标签词, 首词) 的行在记忆前后得到相同的结果"""
+    lines = read_log("pyinstaller.log")
+    first = [value for value, _ in feed(ProgressParser("pyinstaller"), lines)]
+    parser = ProgressParser("pyinstaller")
+    feed(parser, lines)
+    parser.reset()
+    assert [value for value, _ in feed(parser, lines)] == first
+
+
+@pytest.mark.parametrize("name,tool", LOGS)
+def test_throughput(name, tool):
+    """宽松的吞吐量下限，防止解析退化成每行多次正则扫描"""
+    lines = read_log(name) * 2000
+    rate, final = ProgressParser.benchmark(lines, tool)
+    assert final == 100
+    assert rate > 200_000
+
+
+def test_calibrate_keeps_undetected_stages_reachable():
+    """历史中耗时为 0 的阶段校准后仍有宽度，之后的构建仍能进入该阶段"""
+    parser = ProgressParser("nuitka")
+    assert parser.calibrate({"analyzing": 5, "module_analysis": 20, "creating": 10, "compiling": 60, "linking": 5})
+    start, end = parser.stages["finishing"]
+    assert end == 100 and end - start >= 2
+    assert all(end - start > 0 for start, end in parser.stages.values())
+    feed(parser, read_log("nuitka.log"))
+    assert parser.current_progress == 100
+    assert [stage for stage, _ in parser.timeline] == list(parser.stages)
+
+
+def test_compile_watched_ignores_compiler_lines():
+    """编译进度由构建目录给出时，编译器命令行不再推进进度"""
+    parser = ProgressParser("nuitka", compile_watched=True)
+    values = []
+    for line in read_log("nuitka-verbose.log"):
+        value = parser.parse_line(line)
+        if "Backend C linking" in line:
+            break
+        if line.startswith("gcc "):
+            values.append(value)
+    assert values and set(values) == {40}
+    parser = ProgressParser("nuitka", compile_watched=True)
+    parser.parse_line("Nuitka: Running C compilation via Scons.\n")
+    assert parser.feed_fraction("compiling", 0.5) == 62
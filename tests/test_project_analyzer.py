@@ -0,0 +1,26 @@
+"""ProjectAnalyzer 的测试：区分项目内的本地模块与第三方导入。"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import ProjectAnalyzer  # noqa: E402
+
+
+def write(path, text=""):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+
+
+def test_data_directory_does_not_shadow_third_party(tmp_path, monkeypatch):
+    monkeypatch.setenv("LOCALAPPDATA", str(tmp_path / "cache"))
+    project = tmp_path / "proj"
+    write(project / "app.py", "import requests, assets, numpy, helpers, ns.sub.mod\n")
+    write(project / "requests" / "readme.txt", "只有数据文件\n")
+    write(project / "assets" / "__init__.py")
+    write(project / "helpers.py")
+    write(project / "ns" / "sub" / "mod.py")
+    model = ProjectAnalyzer().analyze(str(project / "app.py"))
+    assert model.local_modules == {"assets", "helpers", "ns"}
+    assert model.external_roots == {"requests", "numpy"}
+    assert "requests" in model.external_imports
@@ -0,0 +1,51 @@
+"""增量构建目录的测试：按解释器区分，并按最近使用淘汰。"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main  # noqa: E402
+
+
+class Env:
+    """只提供 get_workspace 用到的解释器信息"""
+    def __init__(self, python_path, version):
+        self.python_path = python_path
+        self.version = version
+
+    def get_interpreter_info(self, signal=None):
+        return {"version": self.version}
+
+
+def workspace(tool_cls, env, target):
+    cmd = [env.python_path, "-m", "nuitka", "--standalone", target]
+    return tool_cls(env).get_workspace(target, cmd)
+
+
+def test_workspace_depends_on_interpreter(tmp_path, monkeypatch):
+    monkeypatch.setenv("LOCALAPPDATA", str(tmp_path))
+    target = str(tmp_path / "app.py")
+    for tool_cls in (main.NuitkaTool, main.PyInstallerTool):
+        a = workspace(tool_cls, Env("/venv-a/bin/python", "Python 3.12.1"), target)
+        b = workspace(tool_cls, Env("/venv-b/bin/python", "Python 3.12.1"), target)
+        c = workspace(tool_cls, Env("/venv-a/bin/python", "Python 3.13.0"), target)
+        assert len({a, b, c}) == 3
+        assert workspace(tool_cls, Env("/venv-a/bin/python", "Python 3.12.1"), target) == a
+
+
+def test_workspaces_evicted_least_recently_used(tmp_path, monkeypatch):
+    monkeypatch.setenv("LOCALAPPDATA", str(tmp_path))
+    env = Env("/venv/bin/python", "Python 3.12.1")
+    limit = main.NuitkaTool.MAX_WORKSPACES
+    paths = []
+    for i in range(limit + 2):
+        if i == limit:
+            workspace(main.NuitkaTool, env, str(tmp_path / "app0.py"))  # 再次使用最早的目录
+        path = workspace(main.NuitkaTool, env, str(tmp_path / f"app{i}.py"))
+        if i < limit:
+            os.utime(path, (1000 + i, 1000 + i))
+        paths.append(path)
+    existing = [p for p in paths if os.path.isdir(p)]
+    assert len(existing) == limit
+    assert paths[0] in existing and paths[1] not in existing and paths[2] not in existing
+    assert not os.path.exists(os.path.dirname(paths[1]))